@@ -0,0 +1,148 @@
+"""
+Compare the async read path (ASYNC_READ_VIEWS on) served by uvicorn over ASGI with the sync views served by
+uvicorn over WSGI (a pool of 10 threads) and over ASGI. Every endpoint is hammered by many concurrent keep-alive
+clients, the script reports requests per second and latency percentiles. Requires uvicorn.
+
+    SECRET_KEY=benchmark python benchmarks/async_read.py [--concurrency 1000] [--duration 10]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+os.environ.setdefault('BENCHMARK_DATABASE', os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3'))
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from routes.models import Route, RouteStop, Stop  # noqa: E402
+from tickets.models import Ticket  # noqa: E402
+
+# Server name: uvicorn arguments and value of BENCHMARK_ASYNC_READ_VIEWS read by benchmarks/settings.py
+SERVERS = {
+    'WSGI': (['tram.wsgi:application', '--interface', 'wsgi'], '0'),
+    'ASGI': (['tram.asgi:application', '--interface', 'asgi3'], '0'),
+    'ASGI async': (['tram.asgi:application', '--interface', 'asgi3'], '1'),
+}
+PORT = 8765
+
+
+def create_data() -> str:
+    """ Create network and tickets of one user, return the user's token """
+    call_command('migrate', verbosity=0)
+    Stop.objects.bulk_create(Stop(name=f'Stop {number}', slug=f'stop-{number}') for number in range(500))
+    stop_ids = list(Stop.objects.values_list('id', flat=True))
+    routes = Route.objects.bulk_create(Route(number=number) for number in range(1, 31))
+    RouteStop.objects.bulk_create(
+        RouteStop(route=route, stop_id=stop_ids[(route.number * 17 + position) % len(stop_ids)],
+                  number_on_route=position, offset=position * 2)
+        for route in routes for position in range(1, 26)
+    )
+    user = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark')
+    start_time = datetime.now(tz=timezone.utc)
+    tickets = [
+        Ticket(owner=user, validity_time=Ticket.TicketTime.TICKET_1_DAY, start_time=start_time + timedelta(days=n))
+        for n in range(20)
+    ]
+    for ticket in tickets:
+        ticket.end_time = ticket.calculate_end_time()
+    Ticket.objects.bulk_create(tickets)
+    return Token.objects.create(user=user).key
+
+
+async def client(path: str, headers: str, deadline: float, latencies: list, errors: list) -> None:
+    """ Send requests over one keep-alive connection until deadline """
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+    except OSError:
+        errors.append(1)
+        return
+    request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n{headers}\r\n'.encode()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            writer.write(request)
+            status_line = await reader.readline()
+            length = 0
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+        except (OSError, asyncio.IncompleteReadError):
+            errors.append(1)
+            break
+        if not status_line.startswith((b'HTTP/1.1 200', b'HTTP/1.1 304')):
+            errors.append(1)
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def load(path: str, headers: str, concurrency: int, duration: float) -> tuple:
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(path, headers, deadline, latencies, errors) for _ in range(concurrency)))
+    latencies.sort()
+
+    def percentile(value: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * value))] * 1000 if latencies else 0
+    return len(latencies) / duration, percentile(0.5), percentile(0.99), len(errors)
+
+
+def wait_for_server() -> None:
+    for _ in range(100):
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', PORT)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError('Server did not start')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    token = create_data()
+    endpoints = {
+        'stop list': ('/api/v1/tram/stops/', ''),
+        'stop details': ('/api/v1/tram/stops/stop-1/', ''),
+        'route list': ('/api/v1/tram/routes/', ''),
+        'route details': ('/api/v1/tram/routes/1/', ''),
+        'my tickets': ('/api/v1/tickets/my_tickets/', f'Authorization: Token {token}\r\n'),
+    }
+
+    print(f'{args.concurrency} concurrent clients, {args.duration:.0f} s per endpoint')
+    print(f'{"endpoint":<16}{"server":<12}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"errors":>8}')
+    for server, (server_args, async_read_views) in SERVERS.items():
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', *server_args, '--port', str(PORT), '--no-access-log',
+             '--log-level', 'warning', '--backlog', str(args.concurrency * 2)],
+            cwd=ROOT, env={**os.environ, 'BENCHMARK_ASYNC_READ_VIEWS': async_read_views},
+        )
+        try:
+            wait_for_server()
+            for name, (path, headers) in endpoints.items():
+                asyncio.run(load(path, headers, 10, 1))
+                rps, p50, p99, errors = asyncio.run(load(path, headers, args.concurrency, args.duration))
+                print(f'{name:<16}{server:<12}{rps:>10.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}')
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare JSONRenderer and ORJSONRenderer on the largest API responses: full stop list, route details
+and admin ticket list. Data is generated in a throwaway test database.
+
+    SECRET_KEY=benchmark python benchmarks/json_renderers.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tram.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db.models import Prefetch  # noqa: E402
+from django.test.utils import setup_databases, setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from routes.models import Route, RouteStop, Stop  # noqa: E402
+from routes.serializers import RouteDetailSerializer, StopValuesSerializer  # noqa: E402
+from tickets.models import Ticket  # noqa: E402
+from tickets.serializers import TicketValuesSerializer  # noqa: E402
+from tram.renderers import ORJSONRenderer  # noqa: E402
+
+STOPS = 5000
+ROUTES = 100
+STOPS_ON_ROUTE = 40
+TICKETS = 20000
+REPEAT = 20
+
+
+def create_data() -> None:
+    Stop.objects.bulk_create(Stop(name=f'Stop {number}', slug=f'stop-{number}') for number in range(STOPS))
+    stop_ids = list(Stop.objects.values_list('id', flat=True))
+    routes = Route.objects.bulk_create(Route(number=number) for number in range(1, ROUTES + 1))
+    RouteStop.objects.bulk_create(
+        RouteStop(route=route, stop_id=stop_ids[(route.number * 37 + position) % STOPS], number_on_route=position,
+                  offset=position * 2)
+        for route in routes for position in range(1, STOPS_ON_ROUTE + 1)
+    )
+    owner = User.objects.create_user('benchmark', 'benchmark@example.com', 'benchmark')
+    start_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    tickets = [
+        Ticket(owner=owner, validity_time=Ticket.TicketTime.TICKET_1_HOUR, start_time=start_time + timedelta(hours=n))
+        for n in range(TICKETS)
+    ]
+    for ticket in tickets:
+        ticket.end_time = ticket.calculate_end_time()
+    Ticket.objects.bulk_create(tickets)
+
+
+def responses() -> dict:
+    route_stops = RouteStop.objects.select_related('stop').order_by('number_on_route')
+    routes = Route.objects.prefetch_related(Prefetch('routestop_set', route_stops)).order_by('number')
+    return {
+        'stop list': StopValuesSerializer(StopValuesSerializer.values(Stop.objects.all()), many=True).data,
+        'route details': [RouteDetailSerializer(route).data for route in routes],
+        'admin ticket list': TicketValuesSerializer(TicketValuesSerializer.values(Ticket.objects.all()),
+                                                    many=True).data,
+    }
+
+
+def measure(renderer, data) -> tuple:
+    seconds = min(timeit.repeat(lambda: renderer.render(data), number=1, repeat=REPEAT))
+    tracemalloc.start()
+    renderer.render(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    setup_test_environment()
+    setup_databases(verbosity=0, interactive=False)
+    create_data()
+
+    print(f'{"response":<20}{"renderer":<16}{"size KiB":>10}{"time ms":>10}{"peak KiB":>10}')
+    for name, data in responses().items():
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            seconds, peak = measure(renderer, data)
+            size = len(renderer.render(data))
+            print(f'{name:<20}{type(renderer).__name__:<16}'
+                  f'{size / 1024:>10.0f}{seconds * 1000:>10.2f}{peak / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+""" Settings of benchmark servers: project settings on a throwaway database """
+import os
+
+from tram.settings import *  # noqa: F401,F403
+from tram.settings import DATABASES
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+DATABASES['default']['NAME'] = os.environ['BENCHMARK_DATABASE']
+# benchmarks/async_read.py turns the async read path on for its "ASGI async" server only
+ASYNC_READ_VIEWS = os.environ.get('BENCHMARK_ASYNC_READ_VIEWS') == '1'
+ROOT_URLCONF = 'tram.async_urls' if ASYNC_READ_VIEWS else 'tram.urls'
@@ -0,0 +1,109 @@
+"""
+Latency of ticket checks: validate endpoint against full ticket retrieve,
+and batch validation of scans uploaded by gate controllers against the same scans validated one by one.
+Requests go through the whole Django stack in process, data is generated in a throwaway test database.
+
+    SECRET_KEY=benchmark python benchmarks/ticket_validation.py [--requests 5000] [--batch 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tram.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.test.utils import setup_databases, setup_test_environment  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import User  # noqa: E402
+from tickets.models import Ticket  # noqa: E402
+
+USERS = 100
+TICKETS = 20000
+BATCHES = 20
+
+
+def create_data() -> APIClient:
+    """ Create tickets of many users and return client of an inspector (staff user) """
+    users = [User.objects.create_user(f'user{number}', f'user{number}@example.com') for number in range(USERS)]
+    start_time = datetime.now(tz=timezone.utc) - timedelta(days=30)
+    tickets = [
+        Ticket(owner=users[number % USERS], validity_time=Ticket.TicketTime.TICKET_1_DAY,
+               start_time=start_time + timedelta(hours=number % (60 * 24)))
+        for number in range(TICKETS)
+    ]
+    for ticket in tickets:
+        ticket.end_time = ticket.calculate_end_time()
+    Ticket.objects.bulk_create(tickets)
+
+    inspector = User.objects.create_superuser('inspector', 'inspector@example.com', 'inspector')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=inspector).key)
+    return client
+
+
+def measure(client: APIClient, urls: list) -> tuple:
+    """ Return p50 and p99 latency in milliseconds of GET requests to urls """
+    latencies = []
+    for url in urls:
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def measure_batches(client: APIClient, batches: list) -> tuple:
+    """ Return time in milliseconds of validating batches one request per batch and one request per ticket """
+    started = time.perf_counter()
+    for ticket_ids in batches:
+        response = client.post('/api/v1/tickets/validate/', {'ids': ticket_ids}, format='json')
+        assert response.status_code == 200, response.status_code
+    batched = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for ticket_ids in batches:
+        for ticket_id in ticket_ids:
+            client.get(f'/api/v1/tickets/{ticket_id}/validate/')
+    one_by_one = time.perf_counter() - started
+    return batched / len(batches) * 1000, one_by_one / len(batches) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    setup_databases(verbosity=0, interactive=False)
+    client = create_data()
+    ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+    scanned = random.Random(0).choices(ticket_ids, k=args.requests)
+
+    results = {
+        'retrieve': measure(client, [f'/api/v1/tickets/{ticket_id}/' for ticket_id in scanned]),
+        'validate': measure(client, [f'/api/v1/tickets/{ticket_id}/validate/' for ticket_id in scanned]),
+    }
+    print(f'{args.requests} requests over {len(ticket_ids)} tickets')
+    print(f'{"endpoint":<24}{"p50 ms":>10}{"p99 ms":>10}')
+    for name, (p50, p99) in results.items():
+        print(f'{name:<24}{p50:>10.2f}{p99:>10.2f}')
+
+    batches = [random.Random(number).sample(ticket_ids, args.batch) for number in range(BATCHES)]
+    batched, one_by_one = measure_batches(client, batches)
+    print(f'\nbatch of {args.batch} scans: {batched:.1f} ms in one request, '
+          f'{one_by_one:.1f} ms one request per ticket')
+
+
+if __name__ == '__main__':
+    main()
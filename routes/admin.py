@@ -1,13 +1,41 @@
+from typing import Iterable
+
 from django.contrib import admin
 
-from .models import Route, RouteStop, Stop, StopConnection
+from .models import NetworkChange, Route, RouteStop, Stop, StopConnection, Timetable
+from .network import network_changed
 
 
 class StopAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
 
 
+def routes_changed(route_ids: Iterable[int]) -> None:
+    """ Recalculate offsets of routes whose stops were edited and log their change """
+    route_ids = set(route_ids) - {None}
+    Route.objects.filter(id__in=route_ids).update_offsets()
+    network_changed(NetworkChange.Kind.ROUTE, route_ids)
+
+
+class RouteStopAdmin(admin.ModelAdmin):
+    """ Stops on route have no signals, editing them updates offsets and logs change of their route """
+
+    def save_model(self, request, obj: RouteStop, form, change: bool) -> None:
+        super().save_model(request, obj, form, change)
+        routes_changed([obj.route_id, form.initial.get('route')])
+
+    def delete_model(self, request, obj: RouteStop) -> None:
+        super().delete_model(request, obj)
+        routes_changed([obj.route_id])
+
+    def delete_queryset(self, request, queryset) -> None:
+        route_ids = set(queryset.values_list('route_id', flat=True))
+        super().delete_queryset(request, queryset)
+        routes_changed(route_ids)
+
+
 admin.site.register(Route)
-admin.site.register(RouteStop)
+admin.site.register(RouteStop, RouteStopAdmin)
 admin.site.register(Stop, StopAdmin)
 admin.site.register(StopConnection)
+admin.site.register(Timetable)
@@ -0,0 +1,19 @@
+from django.urls import path, re_path
+
+from .async_views import read_stops, read_stop, read_routes, read_route
+from .views import StopView, RouteView, StopDetailView
+from tram.views import async_read_view
+
+# List and detail views of the router in routes/urls.py, with async read path in front of them
+route_list = RouteView.as_view({'get': 'list', 'post': 'create'}, basename='routes', detail=False, suffix='List')
+route_detail = RouteView.as_view(
+    {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+    basename='routes', detail=True, suffix='Instance',
+)
+
+urlpatterns = [
+    path('stops/', async_read_view(StopView.as_view(), read_stops), name='stops'),
+    path('stops/<slug>/', async_read_view(StopDetailView.as_view(), read_stop), name='stop_details'),
+    path('routes/', async_read_view(route_list, read_routes), name='routes-list'),
+    re_path(r'^routes/(?P<number>[^/.]+)/$', async_read_view(route_detail, read_route), name='routes-detail'),
+]
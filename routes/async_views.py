@@ -0,0 +1,45 @@
+from typing import Optional
+
+from django.http import HttpResponse
+from rest_framework.request import Request
+
+from .models import Route, Stop
+from .network import async_network_response
+from .serializers import RouteDetailSerializer, RouteValuesSerializer, StopDetailSerializer, StopValuesSerializer
+from tram.views import values_data
+
+# Query parameters handled only by the sync views: search and cursor pagination
+SYNC_QUERY_PARAMS = {'q', 'page_size', 'cursor'}
+
+
+async def read_stops(request: Request) -> Optional[HttpResponse]:
+    """ Async StopView list """
+    if SYNC_QUERY_PARAMS & request.query_params.keys():
+        return None
+    return await async_network_response(request, lambda: values_data(StopValuesSerializer, Stop.objects.all()))
+
+
+async def read_stop(request: Request, slug: str) -> Optional[HttpResponse]:
+    """ Async StopDetailView retrieve """
+    async def build() -> Optional[dict]:
+        stop = await Stop.objects.with_routes().filter(slug=slug).afirst()
+        return None if stop is None else StopDetailSerializer(stop).data
+    return await async_network_response(request, build)
+
+
+async def read_routes(request: Request) -> Optional[HttpResponse]:
+    """ Async RouteView list """
+    if SYNC_QUERY_PARAMS & request.query_params.keys():
+        return None
+    return await async_network_response(request, lambda: values_data(RouteValuesSerializer, Route.objects.with_name()))
+
+
+async def read_route(request: Request, number: str) -> Optional[HttpResponse]:
+    """ Async RouteView retrieve """
+    async def build() -> Optional[dict]:
+        route = await Route.objects.with_ordered_stops().filter(number=int(number)).afirst()
+        return None if route is None else RouteDetailSerializer(route).data
+
+    if not number.isdigit():
+        return None
+    return await async_network_response(request, build)
@@ -0,0 +1,116 @@
+import heapq
+import threading
+from typing import List, Optional, Tuple
+
+from .models import Stop, StopConnection
+from .network import get_stops_version
+
+
+class StopGraph:
+    """
+    In-memory representation of the stop network
+    Stops are addressed by dense indexes, adjacency list keeps (neighbour index, travel time) pairs
+    """
+
+    def __init__(
+            self,
+            stops: List[Tuple[int, str, str]],
+            connections: List[Tuple[int, int, int]],
+            version: int = None
+    ) -> None:
+        self.version = version
+        self.stop_ids = [stop_id for stop_id, _, _ in stops]
+        self.names = [name for _, name, _ in stops]
+        self.slugs = [slug for _, _, slug in stops]
+        self.index_by_id = {stop_id: index for index, stop_id in enumerate(self.stop_ids)}
+        self.index_by_slug = {slug: index for index, slug in enumerate(self.slugs)}
+
+        self.adjacency = [[] for _ in self.stop_ids]
+        for stop1_id, stop2_id, time in connections:
+            stop1, stop2 = self.index_by_id[stop1_id], self.index_by_id[stop2_id]
+            self.adjacency[stop1].append((stop2, time))
+            self.adjacency[stop2].append((stop1, time))
+
+    @classmethod
+    def load(cls) -> 'StopGraph':
+        """ Load all stops and connections from database """
+        version = get_stops_version()
+        stops = list(Stop.objects.order_by('id').values_list('id', 'name', 'slug'))
+        connections = list(StopConnection.objects.values_list('stop1_id', 'stop2_id', 'time'))
+        return cls(stops, connections, version)
+
+    def __len__(self) -> int:
+        return len(self.stop_ids)
+
+    def stop(self, index: int) -> dict:
+        """ Return stop data in the same shape StopSerializer uses """
+        return {'id': self.stop_ids[index], 'name': self.names[index], 'slug': self.slugs[index]}
+
+    def shortest_path(self, source: int, target: int) -> Optional[Tuple[List[int], int]]:
+        """ Find fastest path between two stops with Dijkstra search. Return stop indexes and total time or None """
+        times = {source: 0}
+        previous = {}
+        queue = [(0, source)]
+        visited = set()
+
+        while queue:
+            time, stop = heapq.heappop(queue)
+            if stop == target:
+                path = [target]
+                while path[-1] != source:
+                    path.append(previous[path[-1]])
+                return path[::-1], time
+            if stop in visited:
+                continue
+            visited.add(stop)
+
+            for neighbour, connection_time in self.adjacency[stop]:
+                neighbour_time = time + connection_time
+                if neighbour_time < times.get(neighbour, neighbour_time + 1):
+                    times[neighbour] = neighbour_time
+                    previous[neighbour] = stop
+                    heapq.heappush(queue, (neighbour_time, neighbour))
+        return None
+
+    def shortest_times(self, source: int) -> List[Optional[int]]:
+        """ Find fastest travel time from one stop to every other stop with Dijkstra search, None if not reachable """
+        times = [None] * len(self)
+        times[source] = 0
+        queue = [(0, source)]
+
+        while queue:
+            time, stop = heapq.heappop(queue)
+            if time > times[stop]:
+                continue
+            for neighbour, connection_time in self.adjacency[stop]:
+                neighbour_time = time + connection_time
+                if times[neighbour] is None or neighbour_time < times[neighbour]:
+                    times[neighbour] = neighbour_time
+                    heapq.heappush(queue, (neighbour_time, neighbour))
+        return times
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph() -> StopGraph:
+    """
+    Return stop graph of current process, loading it from database on first use, after invalidation
+    or when stops or connections changed
+    """
+    global _graph
+    graph = _graph
+    if graph is None or graph.version != get_stops_version():
+        with _graph_lock:
+            if _graph is None or _graph.version != get_stops_version():
+                _graph = StopGraph.load()
+            graph = _graph
+    return graph
+
+
+def invalidate_graph() -> None:
+    """ Drop stop graph so it is loaded again on next use """
+    global _graph
+    with _graph_lock:
+        _graph = None
@@ -0,0 +1,285 @@
+import csv
+import io
+import zipfile
+from datetime import timedelta
+from itertools import groupby
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import NetworkChange, Route, RouteStop, Stop, StopConnection
+from .network import network_changed
+
+GTFS_BATCH_SIZE = 1000
+GTFS_AGENCY_ID = 'tram'
+GTFS_SERVICE_ID = 'daily'
+
+# location_type values of stops.txt which are imported: stop/platform and station
+GTFS_STOP_LOCATION_TYPES = ('', '0', '1')
+
+
+def read_gtfs_file(archive: zipfile.ZipFile, name: str) -> Iterator[dict]:
+    """ Read GTFS file from archive row by row """
+    with archive.open(name) as raw_file:
+        yield from csv.DictReader(io.TextIOWrapper(raw_file, encoding='utf-8-sig', newline=''))
+
+
+def parse_gtfs_time(value: str) -> int:
+    """ Convert GTFS time (HH:MM:SS, hours may exceed 24) to seconds """
+    hours, minutes, seconds = value.strip().split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def format_gtfs_time(minutes: int) -> str:
+    """ Convert minutes from midnight to GTFS time """
+    return f'{minutes // 60:02d}:{minutes % 60:02d}:00'
+
+
+def in_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """ Split stream of items into lists of at most batch_size items """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class GTFSImporter:
+    """
+    Import stops, connections and routes from GTFS feed
+    Files are streamed row by row, the first trip of each route defines its stops, travel time of every
+    connection is the average over all trips passing it
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, batch_size: int = GTFS_BATCH_SIZE) -> None:
+        self.archive = archive
+        self.batch_size = batch_size
+        self.stop_ids = {}
+        self.skipped_routes = []
+
+    @transaction.atomic
+    def run(self) -> Dict[str, int]:
+        """ Import whole feed in one transaction and return number of imported objects """
+        self.import_stops()
+        route_numbers = self.read_routes()
+        trip_routes = self.read_trips(route_numbers)
+        route_stops, connection_times = self.read_stop_times(trip_routes)
+        connection_times = {
+            pair: round(total_time / trips_count) for pair, (total_time, trips_count) in connection_times.items()
+        }
+        updated_stop_ids = self.import_connections(connection_times)
+        self.import_routes(route_numbers, route_stops, connection_times)
+        # Offsets of imported routes come from the feed, other routes may pass connections with new travel times
+        imported_numbers = {route_numbers[route_id] for route_id in route_stops}
+        Route.objects.passing(updated_stop_ids).exclude(number__in=imported_numbers).update_offsets()
+        return {
+            'stops': len(set(self.stop_ids.values())),
+            'connections': len(connection_times),
+            'routes': len(route_stops),
+        }
+
+    def import_stops(self) -> None:
+        """ Create missing stops and map GTFS stop ids to stop ids. Platforms are merged into parent stations. """
+        existing_stops = dict(Stop.objects.values_list('slug', 'id'))
+        parent_stations = {}
+        new_stops = {}
+
+        for row in read_gtfs_file(self.archive, 'stops.txt'):
+            if row.get('location_type', '') not in GTFS_STOP_LOCATION_TYPES:
+                continue
+            if row.get('parent_station'):
+                parent_stations[row['stop_id']] = row['parent_station']
+                continue
+            slug = slugify(row['stop_name'])
+            if not slug:
+                continue
+            if slug not in existing_stops and slug not in new_stops:
+                new_stops[slug] = Stop(name=row['stop_name'], slug=slug)
+            self.stop_ids[row['stop_id']] = slug
+
+        for batch in in_batches(new_stops.values(), self.batch_size):
+            created = Stop.objects.bulk_create(batch)
+            for stop in created:
+                existing_stops[stop.slug] = stop.id
+            network_changed(NetworkChange.Kind.STOP, [stop.id for stop in created])
+
+        self.stop_ids = {gtfs_id: existing_stops[slug] for gtfs_id, slug in self.stop_ids.items()}
+        for gtfs_id, parent_id in parent_stations.items():
+            if parent_id in self.stop_ids:
+                self.stop_ids[gtfs_id] = self.stop_ids[parent_id]
+
+    def read_routes(self) -> Dict[str, int]:
+        """
+        Map GTFS route ids to route numbers, routes without numeric short name are skipped
+        Route number identifies route, so two GTFS routes with the same short name make the feed invalid
+        """
+        route_numbers = {}
+        route_ids = {}
+        for row in read_gtfs_file(self.archive, 'routes.txt'):
+            short_name = row.get('route_short_name', '').strip()
+            if short_name.isdigit():
+                number = int(short_name)
+                if number in route_ids:
+                    raise ValueError(f'routes {route_ids[number]} and {row["route_id"]} have the same '
+                                     f'route_short_name {short_name}')
+                route_ids[number] = row['route_id']
+                route_numbers[row['route_id']] = number
+            else:
+                self.skipped_routes.append(row['route_id'])
+        return route_numbers
+
+    def read_trips(self, route_numbers: Dict[str, int]) -> Dict[str, str]:
+        """ Map trip ids to GTFS route ids of imported routes """
+        return {
+            row['trip_id']: row['route_id']
+            for row in read_gtfs_file(self.archive, 'trips.txt') if row['route_id'] in route_numbers
+        }
+
+    def read_stop_times(self, trip_routes: Dict[str, str]) -> Tuple[Dict[str, List[int]], Dict[tuple, list]]:
+        """
+        Stream stop_times.txt trip by trip (rows of one trip are expected to be adjacent, as feeds publish them)
+        Return stop ids of the first trip of each route and accumulated travel times between adjacent stops
+        """
+        route_stops = {}
+        connection_times = {}
+        rows = read_gtfs_file(self.archive, 'stop_times.txt')
+
+        for trip_id, trip_rows in groupby(rows, key=lambda row: row['trip_id']):
+            route_id = trip_routes.get(trip_id)
+            if route_id is None:
+                continue
+            trip_stops = sorted(
+                (int(row['stop_sequence']), self.stop_ids[row['stop_id']],
+                 row['arrival_time'] or row['departure_time'], row['departure_time'] or row['arrival_time'])
+                for row in trip_rows if row['stop_id'] in self.stop_ids
+            )
+            if route_id not in route_stops:
+                route_stops[route_id] = [stop_id for _, stop_id, _, _ in trip_stops]
+
+            for (_, stop1_id, _, departure), (_, stop2_id, arrival, _) in zip(trip_stops[:-1], trip_stops[1:]):
+                if stop1_id == stop2_id or not departure or not arrival:
+                    continue
+                minutes = max(1, round((parse_gtfs_time(arrival) - parse_gtfs_time(departure)) / 60))
+                total = connection_times.setdefault(tuple(sorted((stop1_id, stop2_id))), [0, 0])
+                total[0] += minutes
+                total[1] += 1
+        return route_stops, connection_times
+
+    def import_connections(self, connection_times: Dict[tuple, int]) -> Set[int]:
+        """
+        Create missing connections and update travel time of existing ones. Stop pairs are already ordered.
+        Return ids of stops of connections whose travel time was updated.
+        """
+        existing_connections = {
+            (connection.stop1_id, connection.stop2_id): connection for connection in StopConnection.objects.all()
+        }
+
+        created, updated = [], []
+        for (stop1_id, stop2_id), time in connection_times.items():
+            connection = existing_connections.get((stop1_id, stop2_id))
+            if connection is None:
+                created.append(StopConnection(stop1_id=stop1_id, stop2_id=stop2_id, time=time))
+            elif connection.time != time:
+                connection.time = time
+                updated.append(connection)
+
+        StopConnection.objects.bulk_create(created, batch_size=self.batch_size)
+        StopConnection.objects.bulk_update(updated, ['time'], batch_size=self.batch_size)
+        network_changed(NetworkChange.Kind.CONNECTION, [connection.id for connection in created + updated])
+        return {stop_id for connection in updated for stop_id in (connection.stop1_id, connection.stop2_id)}
+
+    def import_routes(
+            self,
+            route_numbers: Dict[str, int],
+            route_stops: Dict[str, List[int]],
+            connection_times: Dict[tuple, int]
+    ) -> None:
+        """ Create missing routes and replace stops of all imported routes """
+        offsets = {
+            route_numbers[route_id]: Route.calculate_offsets(stop_ids, connection_times)
+            for route_id, stop_ids in route_stops.items()
+        }
+        routes = {route.number: route for route in Route.objects.filter(number__in=offsets)}
+        for route in routes.values():
+            route.duration = offsets[route.number][-1] if offsets[route.number] else 0
+        Route.objects.bulk_update(routes.values(), ['duration'], batch_size=self.batch_size)
+        new_routes = Route.objects.bulk_create([
+            Route(number=number, duration=route_offsets[-1] if route_offsets else 0)
+            for number, route_offsets in offsets.items() if number not in routes
+        ], batch_size=self.batch_size)
+        routes.update((route.number, route) for route in new_routes)
+
+        RouteStop.objects.filter(route__in=routes.values()).delete()
+        new_route_stops = (
+            RouteStop(route=routes[route_numbers[route_id]], stop_id=stop_id, number_on_route=number_on_route,
+                      offset=offset)
+            for route_id, stop_ids in route_stops.items()
+            for number_on_route, (stop_id, offset) in
+            enumerate(zip(stop_ids, offsets[route_numbers[route_id]]), start=1)
+        )
+        for batch in in_batches(new_route_stops, self.batch_size):
+            RouteStop.objects.bulk_create(batch)
+        network_changed(NetworkChange.Kind.ROUTE, [route.id for route in routes.values()])
+
+
+def write_gtfs_file(archive: zipfile.ZipFile, name: str, header: List[str], rows: Iterable[Iterable]) -> None:
+    """ Write rows into GTFS file inside archive without building the whole file in memory """
+    with archive.open(name, 'w') as raw_file:
+        text_file = io.TextIOWrapper(raw_file, encoding='utf-8', newline='')
+        writer = csv.writer(text_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+        text_file.flush()
+        text_file.detach()
+
+
+def export_gtfs(archive: zipfile.ZipFile) -> None:
+    """
+    Write current network as GTFS feed: agency.txt, calendar.txt, stops.txt, routes.txt, trips.txt and
+    stop_times.txt. Every route gets one daily trip starting at 00:00:00, stop times follow offsets of route stops.
+    Stops have no coordinates, all of them are written at GTFS_STOP_LOCATION.
+    """
+    write_gtfs_file(archive, 'agency.txt', ['agency_id', 'agency_name', 'agency_url', 'agency_timezone'], [
+        (GTFS_AGENCY_ID, settings.GTFS_AGENCY_NAME, settings.GTFS_AGENCY_URL, settings.TIME_ZONE),
+    ])
+    start_date = timezone.localdate()
+    end_date = start_date + timedelta(days=settings.GTFS_SERVICE_DAYS)
+    write_gtfs_file(archive, 'calendar.txt', [
+        'service_id', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday',
+        'start_date', 'end_date',
+    ], [
+        (GTFS_SERVICE_ID, *[1] * 7, start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d')),
+    ])
+
+    latitude, longitude = settings.GTFS_STOP_LOCATION
+    stops = Stop.objects.order_by('id').values_list('id', 'name', 'slug')
+    write_gtfs_file(archive, 'stops.txt', ['stop_id', 'stop_name', 'stop_code', 'stop_lat', 'stop_lon'], (
+        (stop_id, name, slug, latitude, longitude) for stop_id, name, slug in stops.iterator()
+    ))
+
+    routes = Route.objects.with_name().order_by('number')
+    write_gtfs_file(archive, 'routes.txt', [
+        'route_id', 'agency_id', 'route_short_name', 'route_long_name', 'route_type',
+    ], (
+        (route.number, GTFS_AGENCY_ID, route.number, route.name, 0) for route in routes.iterator()
+    ))
+    route_numbers = Route.objects.order_by('number').values_list('number', flat=True)
+    write_gtfs_file(archive, 'trips.txt', ['route_id', 'service_id', 'trip_id'], (
+        (number, GTFS_SERVICE_ID, f'route-{number}') for number in route_numbers.iterator()
+    ))
+
+    def stop_times() -> Iterator[tuple]:
+        route_stops = RouteStop.objects.order_by('route__number', 'number_on_route') \
+            .values_list('route__number', 'stop_id', 'number_on_route', 'offset').iterator()
+        for number, stop_id, number_on_route, offset in route_stops:
+            time = format_gtfs_time(offset)
+            yield f'route-{number}', time, time, stop_id, number_on_route
+
+    write_gtfs_file(archive, 'stop_times.txt',
+                    ['trip_id', 'arrival_time', 'departure_time', 'stop_id', 'stop_sequence'], stop_times())
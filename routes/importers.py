@@ -0,0 +1,42 @@
+from typing import Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import NetworkChange, Stop
+from .network import network_changed
+
+STOP_IMPORT_BATCH_SIZE = 500
+
+
+def prepare_stops(names: Iterable[str]) -> Tuple[List[Stop], List[dict]]:
+    """
+    Build unsaved stops for provided names and find all slug collisions
+    Names are checked against each other and against slugs of existing stops loaded with a single query
+    """
+    max_length = Stop._meta.get_field('name').max_length
+    taken_slugs = dict(Stop.objects.values_list('slug', 'name'))
+    stops, errors = [], []
+
+    for name in names:
+        slug = slugify(name)
+        if len(name) > max_length:
+            errors.append({'stops': f'Stop name is longer than {max_length} characters: {name}'})
+        elif not slug:
+            errors.append({'stops': f'Stop name can\'t be converted to slug: {name}'})
+        elif slug in taken_slugs:
+            errors.append({
+                'stops': f'Stop "{name}" slug name collides with another stop slug name (Stop "{taken_slugs[slug]}")'
+            })
+        else:
+            taken_slugs[slug] = name
+            stops.append(Stop(name=name, slug=slug))
+    return stops, errors
+
+
+@transaction.atomic
+def bulk_create_stops(stops: List[Stop], batch_size: int = STOP_IMPORT_BATCH_SIZE) -> List[Stop]:
+    """ Insert prepared stops in batches. Signals are not sent by bulk_create, so network change is reported here """
+    stops = Stop.objects.bulk_create(stops, batch_size=batch_size)
+    network_changed(NetworkChange.Kind.STOP, [stop.id for stop in stops])
+    return stops
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from routes.matrix import build_travel_time_matrix
+
+
+class Command(BaseCommand):
+    help = 'Precompute fastest travel times between all pairs of stops'
+
+    def handle(self, *args, **options) -> None:
+        build_travel_time_matrix(settings.TRAVEL_TIME_MATRIX_PATH)
+        self.stdout.write(self.style.SUCCESS(f'Travel times written to {settings.TRAVEL_TIME_MATRIX_PATH}'))
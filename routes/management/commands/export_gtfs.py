@@ -0,0 +1,17 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from routes.gtfs import export_gtfs
+
+
+class Command(BaseCommand):
+    help = 'Export stops, routes and their stop times as GTFS zip, stops are placed at GTFS_STOP_LOCATION setting'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='Path to GTFS zip file to write')
+
+    def handle(self, *args, **options) -> None:
+        with zipfile.ZipFile(options['path'], 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            export_gtfs(archive)
+        self.stdout.write(self.style.SUCCESS(f'Network exported to {options["path"]}'))
@@ -0,0 +1,30 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from routes.gtfs import GTFS_BATCH_SIZE, GTFSImporter
+
+
+class Command(BaseCommand):
+    help = 'Import stops, connections and routes from GTFS zip (stops.txt, routes.txt, trips.txt, stop_times.txt)'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='Path to GTFS zip file')
+        parser.add_argument('--batch-size', type=int, default=GTFS_BATCH_SIZE,
+                            help='Number of objects inserted with one query')
+
+    def handle(self, *args, **options) -> None:
+        """ Import feed in a single transaction """
+        try:
+            with zipfile.ZipFile(options['path']) as archive:
+                importer = GTFSImporter(archive, batch_size=options['batch_size'])
+                imported = importer.run()
+        except (KeyError, ValueError, zipfile.BadZipFile) as e:
+            raise CommandError(f'Invalid GTFS feed: {e}')
+
+        for route_id in importer.skipped_routes:
+            self.stderr.write(f'Route {route_id} skipped: route_short_name is not a number')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported["stops"]} stop(s), {imported["connections"]} connection(s), '
+            f'{imported["routes"]} route(s)'
+        ))
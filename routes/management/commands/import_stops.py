@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from routes.importers import STOP_IMPORT_BATCH_SIZE, bulk_create_stops, prepare_stops
+
+
+class Command(BaseCommand):
+    help = 'Import stops from a text file with one stop name per line'
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument('path', help='Path to file with stop names')
+        parser.add_argument('--batch-size', type=int, default=STOP_IMPORT_BATCH_SIZE,
+                            help='Number of stops inserted with one query')
+
+    def handle(self, *args, **options) -> None:
+        """ Check all names for collisions and import stops only if there are none """
+        with open(options['path'], encoding='utf-8') as stops_file:
+            names = [line.strip() for line in stops_file if line.strip()]
+
+        stops, errors = prepare_stops(names)
+        if errors:
+            for error in errors:
+                self.stderr.write(error['stops'])
+            raise CommandError(f'{len(errors)} stop(s) can\'t be imported, nothing was saved')
+
+        stops = bulk_create_stops(stops, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Imported {len(stops)} stop(s)'))
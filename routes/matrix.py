@@ -0,0 +1,167 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+
+from .graph import StopGraph, get_graph
+from .network import get_stops_version
+
+logger = logging.getLogger(__name__)
+
+# File layout: header (magic, stops version, stops count), stop ids, stops count x stops count travel times
+MATRIX_HEADER = struct.Struct('=4sqI')
+MATRIX_MAGIC = b'TTM1'
+MATRIX_ROWS_BATCH = 64
+
+# Travel times are stored as unsigned 16-bit minutes, the largest value marks unreachable stops
+UNREACHABLE = 0xFFFF
+
+
+class TravelTimeMatrix:
+    """
+    All-pairs fastest travel times between stops, memory-mapped from file
+    Pages of the file are shared by all worker processes reading it, lookup of a pair is a single array access
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as matrix_file:
+            self._mmap = mmap.mmap(matrix_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.size = MATRIX_HEADER.unpack_from(self._mmap)
+        if magic != MATRIX_MAGIC:
+            raise ValueError(f'{path} is not a travel time matrix file')
+
+        data = memoryview(self._mmap)
+        ids_end = MATRIX_HEADER.size + self.size * 8
+        stop_ids = data[MATRIX_HEADER.size:ids_end].cast('q')
+        self.index_by_id = {stop_id: index for index, stop_id in enumerate(stop_ids)}
+        self.times = data[ids_end:].cast('H')
+
+    def time(self, stop1_id: int, stop2_id: int) -> Optional[int]:
+        """ Return fastest travel time in minutes between two stops or None if stops are not connected """
+        time = self.times[self.index_by_id[stop1_id] * self.size + self.index_by_id[stop2_id]]
+        return None if time == UNREACHABLE else time
+
+
+def build_travel_time_matrix(path: str, graph: StopGraph = None) -> None:
+    """
+    Compute travel times from every stop with repeated Dijkstra search and write them to file
+    Rows are written in batches, so memory use does not grow with the network size squared.
+    The file is replaced atomically, readers keep their mapping of the previous one.
+    """
+    graph = graph or get_graph()
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as matrix_file:
+        matrix_file.write(MATRIX_HEADER.pack(MATRIX_MAGIC, graph.version or 0, len(graph)))
+        array('q', graph.stop_ids).tofile(matrix_file)
+        for batch_start in range(0, len(graph), MATRIX_ROWS_BATCH):
+            rows = array('H')
+            for source in range(batch_start, min(batch_start + MATRIX_ROWS_BATCH, len(graph))):
+                rows.extend(UNREACHABLE if time is None else min(time, UNREACHABLE - 1)
+                            for time in graph.shortest_times(source))
+            rows.tofile(matrix_file)
+    os.replace(matrix_file.name, path)
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+_rebuild_executor = ThreadPoolExecutor(max_workers=1)
+_rebuild_scheduled = False
+_rebuild_lock = threading.Lock()
+
+
+def _open_matrix() -> Optional[TravelTimeMatrix]:
+    """ Open matrix file or return None if it wasn't built yet """
+    try:
+        return TravelTimeMatrix(settings.TRAVEL_TIME_MATRIX_PATH)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+
+
+def get_matrix_file_version() -> Optional[int]:
+    """ Read stops version the matrix file was built for from its header, None if there is no valid file """
+    try:
+        with open(settings.TRAVEL_TIME_MATRIX_PATH, 'rb') as matrix_file:
+            magic, version, _ = MATRIX_HEADER.unpack(matrix_file.read(MATRIX_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+    return version if magic == MATRIX_MAGIC else None
+
+
+def get_travel_time_matrix() -> Optional[TravelTimeMatrix]:
+    """
+    Return travel time matrix of current stops version or, while it is rebuilt, the latest one built
+    Matrix is never computed on request path: missing or outdated file schedules a background rebuild.
+    None is returned if no matrix was built yet.
+    """
+    global _matrix
+    version = get_stops_version()
+    matrix = _matrix
+    if matrix is not None and matrix.version == version:
+        return matrix
+    with _matrix_lock:
+        file_version = get_matrix_file_version()
+        if file_version is not None and (_matrix is None or _matrix.version != file_version):
+            _matrix = _open_matrix()
+        if file_version != version:
+            schedule_travel_time_matrix_rebuild()
+        return _matrix
+
+
+def travel_time_matrix_exists() -> bool:
+    """ Whether some process built travel time matrix, so it has to be kept up to date """
+    return os.path.exists(settings.TRAVEL_TIME_MATRIX_PATH)
+
+
+def invalidate_travel_time_matrix() -> None:
+    """ Drop matrix opened by current process, the file is opened again on next use """
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+def rebuild_travel_time_matrix() -> bool:
+    """
+    Build matrix file for current stops version unless it is up to date, return whether it was built
+    Processes sharing the file build it under an exclusive file lock, so the matrix of one version is built once
+    and the others find it up to date
+    """
+    with open(f'{settings.TRAVEL_TIME_MATRIX_PATH}.lock', 'wb') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        graph = get_graph()
+        if get_matrix_file_version() == graph.version:
+            return False
+        build_travel_time_matrix(settings.TRAVEL_TIME_MATRIX_PATH, graph)
+        return True
+
+
+def _rebuild_in_background() -> None:
+    global _rebuild_scheduled
+    # Cleared before building, so stops changed meanwhile schedule one more rebuild
+    with _rebuild_lock:
+        _rebuild_scheduled = False
+    try:
+        rebuild_travel_time_matrix()
+    except Exception:
+        # Executor keeps exceptions in futures nobody waits for
+        logger.exception('Travel time matrix rebuild failed')
+    finally:
+        connection.close()
+
+
+def schedule_travel_time_matrix_rebuild() -> None:
+    """ Rebuild matrix in background thread, at most one rebuild of this process is waiting at a time """
+    global _rebuild_scheduled
+    with _rebuild_lock:
+        if _rebuild_scheduled:
+            return
+        _rebuild_scheduled = True
+    _rebuild_executor.submit(_rebuild_in_background)
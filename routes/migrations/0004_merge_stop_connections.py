@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def merge_stop_connections(apps, schema_editor):
+    """
+    Store every connection with lower stop id first and merge duplicates of the same pair of stops
+    The oldest connection of a pair is kept with the shortest travel time among duplicates
+    """
+    StopConnection = apps.get_model('routes', 'StopConnection')
+    kept_connections = {}
+    duplicate_ids = []
+
+    for connection in StopConnection.objects.order_by('id'):
+        if connection.stop1_id == connection.stop2_id:
+            duplicate_ids.append(connection.id)
+            continue
+        pair = (min(connection.stop1_id, connection.stop2_id), max(connection.stop1_id, connection.stop2_id))
+        kept_connection = kept_connections.get(pair)
+        if kept_connection is None:
+            connection.stop1_id, connection.stop2_id = pair
+            kept_connections[pair] = connection
+        else:
+            kept_connection.time = min(kept_connection.time, connection.time)
+            duplicate_ids.append(connection.id)
+
+    StopConnection.objects.filter(id__in=duplicate_ids).delete()
+    StopConnection.objects.bulk_update(kept_connections.values(), ['stop1_id', 'stop2_id', 'time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0003_rename_routestops_routestop'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_stop_connections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0004_merge_stop_connections'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='stopconnection',
+            constraint=models.UniqueConstraint(fields=('stop1', 'stop2'), name='unique_stop_connection'),
+        ),
+        migrations.AddConstraint(
+            model_name='stopconnection',
+            constraint=models.CheckConstraint(check=models.Q(('stop1__lt', models.F('stop2'))), name='stop_connection_stops_order'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:38
+
+from itertools import groupby
+
+from django.db import migrations, models
+
+
+def fill_offsets(apps, schema_editor):
+    """ Calculate offsets of existing route stops and duration of existing routes from connection travel times """
+    Route = apps.get_model('routes', 'Route')
+    RouteStop = apps.get_model('routes', 'RouteStop')
+    StopConnection = apps.get_model('routes', 'StopConnection')
+
+    connection_times = {
+        (stop1_id, stop2_id): time
+        for stop1_id, stop2_id, time in StopConnection.objects.values_list('stop1_id', 'stop2_id', 'time')
+    }
+    route_stops = RouteStop.objects.order_by('route_id', 'number_on_route')
+    changed_routes, changed_route_stops = [], []
+    for route_id, stops_on_route in groupby(route_stops, key=lambda route_stop: route_stop.route_id):
+        offset, previous_stop_id = 0, None
+        for route_stop in stops_on_route:
+            if previous_stop_id is not None:
+                pair = (min(previous_stop_id, route_stop.stop_id), max(previous_stop_id, route_stop.stop_id))
+                offset += connection_times.get(pair, 0)
+            route_stop.offset = offset
+            changed_route_stops.append(route_stop)
+            previous_stop_id = route_stop.stop_id
+        changed_routes.append(Route(id=route_id, duration=offset))
+
+    RouteStop.objects.bulk_update(changed_route_stops, ['offset'], batch_size=500)
+    Route.objects.bulk_update(changed_routes, ['duration'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0005_stop_connection_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='duration',
+            field=models.IntegerField(default=0, help_text='Travel time in minutes from the first to the last stop'),
+        ),
+        migrations.AddField(
+            model_name='routestop',
+            name='offset',
+            field=models.IntegerField(default=0, help_text='Travel time in minutes from the first stop of route'),
+        ),
+        migrations.RunPython(fill_offsets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0006_route_stop_offset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timetable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('service_days', models.IntegerField(choices=[(1, 'Weekdays'), (2, 'Saturday'), (3, 'Sunday')])),
+                ('first_departure', models.TimeField(help_text='First departure from the first stop of route')),
+                ('last_departure', models.TimeField(help_text='Last departure from the first stop of route')),
+                ('headway', models.IntegerField(help_text='Minutes between departures')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetables', to='routes.route')),
+            ],
+        ),
+    ]
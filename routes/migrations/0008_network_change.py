@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+STOP, CONNECTION, ROUTE = 1, 2, 3
+
+
+def log_existing_network(apps, schema_editor):
+    """ Record all existing stops, connections and routes, so changes since version 0 are the whole network """
+    NetworkChange = apps.get_model('routes', 'NetworkChange')
+    for kind, model in ((STOP, 'Stop'), (CONNECTION, 'StopConnection'), (ROUTE, 'Route')):
+        object_ids = apps.get_model('routes', model).objects.order_by('id').values_list('id', flat=True)
+        NetworkChange.objects.bulk_create(
+            (NetworkChange(kind=kind, object_id=object_id) for object_id in object_ids.iterator()), batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0007_timetable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.IntegerField(choices=[(1, 'Stop'), (2, 'Connection'), (3, 'Route')])),
+                ('object_id', models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(log_existing_network, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0008_network_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='networkchange',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0009_network_change_created'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='networkchange',
+            index=models.Index(fields=['kind', 'id'], name='routes_netw_kind_09d07d_idx'),
+        ),
+    ]
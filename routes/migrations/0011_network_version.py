@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:05
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_versions(apps, schema_editor):
+    """ Existing changes keep their id as version, so clients synced to it stay valid; counter continues from it """
+    NetworkChange = apps.get_model('routes', 'NetworkChange')
+    NetworkVersion = apps.get_model('routes', 'NetworkVersion')
+    NetworkChange.objects.update(version=F('id'))
+    latest = NetworkChange.objects.order_by('-id').values_list('id', 'created').first()
+    version, modified = latest or (0, datetime.fromtimestamp(0, tz=timezone.utc))
+    NetworkVersion.objects.create(pk=1, version=version, modified=modified)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('routes', '0010_network_change_kind_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NetworkVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+                ('modified', models.DateTimeField()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='networkchange',
+            name='routes_netw_kind_09d07d_idx',
+        ),
+        migrations.AddField(
+            model_name='networkchange',
+            name='version',
+            field=models.BigIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_versions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='networkchange',
+            index=models.Index(fields=['version'], name='routes_netw_version_0fe5a5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='networkchange',
+            index=models.Index(fields=['kind', 'version'], name='routes_netw_kind_f648da_idx'),
+        ),
+    ]
@@ -1,12 +1,25 @@
+from typing import Dict, Iterable, List, Tuple
+
+from django.core.exceptions import ValidationError as ModelValidationError
 from django.db import models
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
 
 
+class StopQuerySet(models.QuerySet):
+
+    def with_routes(self) -> 'StopQuerySet':
+        """ Prefetch routes on stop together with their names into "routes" """
+        return self.prefetch_related(Prefetch('route_set', Route.objects.with_name(), to_attr='routes'))
+
+
 class Stop(models.Model):
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True)
 
+    objects = StopQuerySet.as_manager()
+
     prepopulated_fields = {"slug": ("title",)}
 
     def save(self, *args, **kwargs) -> None:
@@ -23,27 +36,133 @@ class Stop(models.Model):
         return self.name
 
 
+class StopConnectionQuerySet(models.QuerySet):
+
+    def between(self, stop1_id: int, stop2_id: int) -> 'StopConnectionQuerySet':
+        """ Filter connection between two stops regardless of their order """
+        return self.filter(stop1_id=min(stop1_id, stop2_id), stop2_id=max(stop1_id, stop2_id))
+
+
 class StopConnection(models.Model):
+    """ Connection between two stops. Connections are not directed and stored with lower stop id first. """
     stop1 = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='+')
     stop2 = models.ForeignKey(Stop, on_delete=models.CASCADE, related_name='+')
     time = models.IntegerField(default=2, help_text='Travel time in minutes')
 
+    objects = StopConnectionQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stop1', 'stop2'], name='unique_stop_connection'),
+            models.CheckConstraint(check=Q(stop1__lt=F('stop2')), name='stop_connection_stops_order'),
+        ]
+
+    def order_stops(self) -> None:
+        """ Put stop with lower id first, so every pair of stops has a single canonical connection """
+        if self.stop1_id is not None and self.stop2_id is not None and self.stop1_id > self.stop2_id:
+            self.stop1_id, self.stop2_id = self.stop2_id, self.stop1_id
+
+    def clean(self) -> None:
+        self.order_stops()
+
+    def save(self, *args, **kwargs) -> None:
+        self.order_stops()
+        super(StopConnection, self).save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.stop1} - {self.stop2}'
 
 
+class RouteQuerySet(models.QuerySet):
+
+    def with_name(self) -> 'RouteQuerySet':
+        """ Annotate routes with first/last stop names and stops count, so name is computed without extra queries """
+        stops_on_route = RouteStop.objects.filter(route=OuterRef('pk'))
+        stops_count = stops_on_route.order_by().values('route').annotate(count=Count('pk')).values('count')
+        return self.annotate(
+            stops_count=Subquery(stops_count),
+            first_stop_name=Subquery(stops_on_route.order_by('number_on_route').values('stop__name')[:1]),
+            last_stop_name=Subquery(stops_on_route.order_by('-number_on_route').values('stop__name')[:1]),
+        )
+
+    def with_ordered_stops(self) -> 'RouteQuerySet':
+        """ Prefetch route stops with their stops in order into "ordered_stops", route name is derived from them """
+        route_stops = RouteStop.objects.select_related('stop').order_by('number_on_route')
+        return self.prefetch_related(Prefetch('routestop_set', route_stops, to_attr='ordered_stops'))
+
+    def passing(self, stop_ids: Iterable[int]) -> 'RouteQuerySet':
+        """ Filter routes stopping at any of given stops """
+        return self.filter(stops__in=stop_ids).distinct()
+
+    def update_offsets(self) -> None:
+        """ Recalculate offsets and duration of every route, after travel times or stops on route changed """
+        for route in self:
+            route.update_offsets()
+
+
 class Route(models.Model):
     number = models.IntegerField(unique=True)
     stops = models.ManyToManyField(Stop, through='RouteStop')
+    duration = models.IntegerField(default=0, help_text='Travel time in minutes from the first to the last stop')
+
+    objects = RouteQuerySet.as_manager()
 
     @property
     def name(self) -> str:
         """ Create route name basing on first and last stop, if no stops - use route number """
-        stops_on_route = self.routestop_set.all().order_by('number_on_route')
+        if not hasattr(self, 'ordered_stops') and hasattr(self, 'stops_count'):
+            return self.format_name(self.number, self.stops_count, self.first_stop_name, self.last_stop_name)
+
+        stops_on_route = self.ordered_route_stops()
         if len(stops_on_route) > 1:
-            return f'{stops_on_route[0].stop.name} - {stops_on_route[len(stops_on_route) - 1].stop.name}'
+            return f'{stops_on_route[0].stop.name} - {stops_on_route[-1].stop.name}'
         return self.number
 
+    def ordered_route_stops(self) -> List['RouteStop']:
+        """ Route stops ordered by number on route, taken from "ordered_stops" prefetched by with_ordered_stops() """
+        if hasattr(self, 'ordered_stops'):
+            return self.ordered_stops
+        return list(self.routestop_set.select_related('stop').order_by('number_on_route'))
+
+    @staticmethod
+    def format_name(number: int, stops_count: int, first_stop_name: str, last_stop_name: str) -> str:
+        """ Route name from values annotated by RouteQuerySet.with_name() """
+        if stops_count and stops_count > 1:
+            return f'{first_stop_name} - {last_stop_name}'
+        return number
+
+    @staticmethod
+    def calculate_offsets(stop_ids: List[int], connection_times: Dict[Tuple[int, int], int]) -> List[int]:
+        """ Calculate travel time from the first stop to each stop, connection times are keyed by ordered stop ids """
+        offsets = [0] if stop_ids else []
+        for stop1_id, stop2_id in zip(stop_ids[:-1], stop_ids[1:]):
+            offsets.append(offsets[-1] + connection_times.get((min(stop1_id, stop2_id), max(stop1_id, stop2_id)), 0))
+        return offsets
+
+    def update_offsets(self) -> None:
+        """ Recalculate offsets of route stops and route duration from current connection travel times """
+        route_stops = list(self.routestop_set.order_by('number_on_route'))
+        stop_ids = [route_stop.stop_id for route_stop in route_stops]
+        connection_times = {
+            (stop1_id, stop2_id): time
+            for stop1_id, stop2_id, time in StopConnection.objects.filter(stop1_id__in=stop_ids, stop2_id__in=stop_ids)
+            .values_list('stop1_id', 'stop2_id', 'time')
+        }
+        offsets = self.calculate_offsets(stop_ids, connection_times)
+
+        changed_route_stops = []
+        for route_stop, offset in zip(route_stops, offsets):
+            if route_stop.offset != offset:
+                route_stop.offset = offset
+                changed_route_stops.append(route_stop)
+        RouteStop.objects.bulk_update(changed_route_stops, ['offset'])
+
+        # Route is saved whenever its stops changed, so the change is logged for the route too
+        duration = offsets[-1] if offsets else 0
+        if changed_route_stops or self.duration != duration:
+            self.duration = duration
+            self.save(update_fields=['duration'])
+
     def __str__(self):
         return str(self.number)
 
@@ -52,6 +171,68 @@ class RouteStop(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE)
     stop = models.ForeignKey(Stop, on_delete=models.CASCADE)
     number_on_route = models.IntegerField()
+    offset = models.IntegerField(default=0, help_text='Travel time in minutes from the first stop of route')
 
     def __str__(self):
         return f'Route {self.route} | stop {self.number_on_route} ({self.stop})'
+
+
+class Timetable(models.Model):
+    """ Headway based service of route: departures from the first stop every headway minutes within time period """
+
+    class ServiceDays(models.IntegerChoices):
+        WEEKDAYS = 1
+        SATURDAY = 2
+        SUNDAY = 3
+
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name='timetables')
+    service_days = models.IntegerField(choices=ServiceDays.choices)
+    first_departure = models.TimeField(help_text='First departure from the first stop of route')
+    last_departure = models.TimeField(help_text='Last departure from the first stop of route')
+    headway = models.IntegerField(help_text='Minutes between departures')
+
+    def clean(self) -> None:
+        """ Verify departure period and headway are valid """
+        if self.headway is not None and self.headway <= 0:
+            raise ModelValidationError({'headway': 'Headway must be a positive number of minutes'})
+        if self.first_departure and self.last_departure and self.last_departure < self.first_departure:
+            raise ModelValidationError({'last_departure': 'Last departure can\'t be earlier than the first one'})
+
+    def __str__(self):
+        return f'Route {self.route} | {self.get_service_days_display()} {self.first_departure:%H:%M}-' \
+               f'{self.last_departure:%H:%M} every {self.headway} min'
+
+
+class NetworkVersion(models.Model):
+    """
+    Counter of network versions, the only row is locked and bumped by every transaction logging network changes
+    Versions are therefore handed out in commit order, unlike autoincrement ids of the change log
+    """
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.version} ({self.modified})'
+
+
+class NetworkChange(models.Model):
+    """
+    Log of writes to stops, connections and routes, each change stores network version it created
+    Only kind and id of changed object are kept, its current state (or its absence) tells what happened to it
+    """
+
+    class Kind(models.IntegerChoices):
+        STOP = 1
+        CONNECTION = 2
+        ROUTE = 3
+
+    kind = models.IntegerField(choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+    version = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['version']), models.Index(fields=['kind', 'version'])]
+
+    def __str__(self):
+        return f'{self.version}: {self.get_kind_display()} {self.object_id}'
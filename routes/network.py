@@ -0,0 +1,198 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .models import NetworkChange, NetworkVersion
+from tram.views import render_json
+
+NETWORK_RESPONSE_KEY = 'routes:network-response:{version}:{path}'
+NEVER_MODIFIED = datetime.fromtimestamp(0, tz=timezone.utc)
+
+STOPS_CHANGE_KINDS = (NetworkChange.Kind.STOP, NetworkChange.Kind.CONNECTION)
+
+# (monotonic time of reading, network version, network modification time) last read by this process
+_state = None
+# (monotonic time of reading, stops version) last read by this process
+_stops_state = None
+
+
+def _fresh(state: Optional[tuple]) -> Optional[tuple]:
+    """ Return state memoized by this process if it was read less than NETWORK_VERSION_TTL seconds ago """
+    if state is None or time.monotonic() - state[0] >= settings.NETWORK_VERSION_TTL:
+        return None
+    return state
+
+
+def _fresh_network_state() -> Optional[tuple]:
+    return _fresh(_state)
+
+
+def get_network_state() -> Tuple[int, datetime]:
+    """
+    Return version of stops/routes data and time it was modified, as counted by NetworkVersion
+    The counter is the source of truth shared by all processes, each of them reads it at most once
+    per NETWORK_VERSION_TTL seconds
+    """
+    global _state
+    state = _fresh_network_state()
+    if state is None:
+        version, modified = read_network_state()
+        state = _state = (time.monotonic(), version, modified)
+    return state[1], state[2]
+
+
+def read_network_state() -> Tuple[int, datetime]:
+    """ Read network version and modification time from the database, bypassing memo of this process """
+    return NetworkVersion.objects.values_list('version', 'modified').first() or (0, NEVER_MODIFIED)
+
+
+def get_network_version() -> int:
+    """ Return current version of stops/routes data, the same version always means the same data """
+    return get_network_state()[0]
+
+
+def get_network_modified() -> datetime:
+    """ Return time of the last write to stops/routes data """
+    return get_network_state()[1]
+
+
+def get_stops_version() -> int:
+    """
+    Return version of stops and connections alone: version of the latest stop or connection change
+    Stop graph and travel times depend on nothing else, so route and timetable writes leave them in place
+    """
+    global _stops_state
+    state = _fresh(_stops_state)
+    if state is None:
+        changes = NetworkChange.objects.filter(kind__in=STOPS_CHANGE_KINDS)
+        state = _stops_state = (time.monotonic(), changes.aggregate(version=Max('version'))['version'] or 0)
+    return state[1]
+
+
+def invalidate_network_state() -> None:
+    """ Make this process read network and stops versions from the database on next use """
+    global _state, _stops_state
+    _state = _stops_state = None
+
+
+def network_changed(kind: int, object_ids: Iterable[int]) -> None:
+    """
+    Record change of objects of given kind in the change log under a new network version
+    The version counter stays locked until current transaction ends, so versions become visible in the order
+    they were handed out. This process sees the new version once the transaction is committed, other processes
+    within NETWORK_VERSION_TTL seconds.
+    """
+    object_ids = set(object_ids)
+    if not object_ids:
+        return
+    # No savepoint: failed write breaks the surrounding transaction anyway
+    with transaction.atomic(savepoint=False):
+        counter, _ = NetworkVersion.objects.select_for_update().get_or_create(
+            pk=1, defaults={'modified': datetime.now(tz=timezone.utc)}
+        )
+        counter.version += 1
+        counter.modified = datetime.now(tz=timezone.utc)
+        counter.save(update_fields=['version', 'modified'])
+        NetworkChange.objects.bulk_create([
+            NetworkChange(kind=kind, object_id=object_id, version=counter.version) for object_id in object_ids
+        ])
+    invalidate_network_state()
+    transaction.on_commit(invalidate_network_state)
+
+
+def format_network_etag(version: int, path: str, media_type: str) -> str:
+    """ Strong ETag of a network response: network version plus requested path and media type """
+    representation = f'{path} {media_type}'
+    return f'{version}-{hashlib.md5(representation.encode()).hexdigest()[:16]}'
+
+
+def network_response_key(version: int, path: str) -> str:
+    """ Cache key of network response data for requested path """
+    return NETWORK_RESPONSE_KEY.format(version=version, path=hashlib.md5(path.encode()).hexdigest())
+
+
+def network_etag(request: Request, *args, **kwargs) -> str:
+    """ ETag of a network response in current network version """
+    return format_network_etag(get_network_version(), request.get_full_path(), request.accepted_media_type)
+
+
+def network_last_modified(request: Request, *args, **kwargs) -> datetime:
+    """ Last-Modified of a network response """
+    return get_network_modified()
+
+
+# Answers matching If-None-Match / If-Modified-Since with 304 before the view touches the database
+network_conditional = condition(etag_func=network_etag, last_modified_func=network_last_modified)
+
+
+def cache_network_response(view: Callable) -> Callable:
+    """
+    Cache response data of a read-only network view under current network version
+    Any write to stops, connections or routes moves network to a new version, processes stop serving data cached
+    for the previous one within NETWORK_VERSION_TTL seconds
+    """
+    @wraps(view)
+    def wrapper(request: Request, *args, **kwargs) -> Response:
+        key = network_response_key(get_network_version(), request.get_full_path())
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.NETWORK_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+async def aget_network_state() -> Tuple[int, datetime]:
+    """ Async get_network_state, the database is queried in a thread only when memoized state is stale """
+    state = _fresh_network_state()
+    if state is None:
+        return await sync_to_async(get_network_state)()
+    return state[1], state[2]
+
+
+async def async_network_response(
+        request: Request,
+        build: Callable[[], Awaitable[Optional[object]]]
+) -> Optional[HttpResponse]:
+    """
+    Async counterpart of network_conditional and cache_network_response for requests negotiated to JSON
+    Conditional requests are answered with 304, response data is shared with the sync views through the cache
+    and built by "build" coroutine on miss. None is returned if "build" finds nothing to respond with.
+    """
+    version, modified = await aget_network_state()
+    path = request.get_full_path()
+    etag = quote_etag(format_network_etag(version, path, request.accepted_media_type))
+    last_modified = int(modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    key = network_response_key(version, path)
+    data = await cache.aget(key)
+    if data is None:
+        data = await build()
+        if data is None:
+            return None
+        await cache.aset(key, data, settings.NETWORK_CACHE_TIMEOUT)
+
+    response = render_json(request, data)
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    return response
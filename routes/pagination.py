@@ -0,0 +1,9 @@
+from tram.pagination import OptInCursorPagination
+
+
+class StopPagination(OptInCursorPagination):
+    ordering = 'id'
+
+
+class RoutePagination(OptInCursorPagination):
+    ordering = 'number'
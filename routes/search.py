@@ -0,0 +1,91 @@
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import List, Set
+
+from django.utils.text import slugify
+
+from .graph import StopGraph, get_graph
+
+SEARCH_RESULTS_LIMIT = 10
+TRIGRAM_SIMILARITY_THRESHOLD = 0.3
+
+
+def normalize(text: str) -> str:
+    """ Lowercase text without accents and punctuation, words separated by single spaces """
+    return slugify(text).replace('-', ' ')
+
+
+def trigrams(text: str) -> Set[str]:
+    """ Trigrams of normalized text padded the same way PostgreSQL pg_trgm does """
+    padded = f'  {text} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+class StopSearchIndex:
+    """
+    In-memory search index over stop names and slugs built from stop graph
+    Prefixes are looked up with binary search over sorted terms (stop name, each of its words and slug),
+    misspelled queries fall back to trigram similarity over an inverted trigram index
+    """
+
+    def __init__(self, graph: StopGraph) -> None:
+        self.graph = graph
+        self.names = [normalize(name) for name in graph.names]
+
+        terms = set()
+        self.trigrams = defaultdict(list)
+        self.trigrams_count = []
+        for index, (name, slug) in enumerate(zip(self.names, graph.slugs)):
+            terms.add((name, index))
+            terms.add((slug, index))
+            terms.update((word, index) for word in name.split())
+            name_trigrams = trigrams(name)
+            for trigram in name_trigrams:
+                self.trigrams[trigram].append(index)
+            self.trigrams_count.append(len(name_trigrams))
+        self.terms = sorted(terms)
+
+    def search(self, query: str, limit: int = SEARCH_RESULTS_LIMIT) -> List[dict]:
+        """ Return stops matching query: exact and prefix matches first, then similar names """
+        query = normalize(query)
+        if not query:
+            return []
+
+        prefix_matches = set()
+        position = bisect_left(self.terms, (query, -1))
+        while position < len(self.terms) and self.terms[position][0].startswith(query):
+            prefix_matches.add(self.terms[position][1])
+            position += 1
+        results = sorted(prefix_matches, key=lambda index: (
+            self.names[index] != query, not self.names[index].startswith(query), len(self.names[index]), index
+        ))[:limit]
+
+        if len(results) < limit:
+            query_trigrams = trigrams(query)
+            shared = Counter(index for trigram in query_trigrams for index in self.trigrams.get(trigram, ()))
+            similar = []
+            for index, shared_count in shared.items():
+                similarity = shared_count / (len(query_trigrams) + self.trigrams_count[index] - shared_count)
+                if similarity >= TRIGRAM_SIMILARITY_THRESHOLD and index not in prefix_matches:
+                    similar.append((-similarity, index))
+            results += [index for _, index in sorted(similar)[:limit - len(results)]]
+
+        return [self.graph.stop(index) for index in results]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> StopSearchIndex:
+    """ Return stop search index of current process, it is rebuilt whenever stop graph is reloaded """
+    global _index
+    graph = get_graph()
+    index = _index
+    if index is None or index.graph is not graph:
+        with _index_lock:
+            if _index is None or _index.graph is not graph:
+                _index = StopSearchIndex(graph)
+            index = _index
+    return index
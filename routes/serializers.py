@@ -1,8 +1,13 @@
-from typing import Dict, List, Tuple
+from collections import defaultdict, deque
+from typing import List, Optional, Set, Tuple
 
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import Stop, Route, RouteStop, StopConnection
+from .models import NetworkChange, Stop, Route, RouteStop, StopConnection
+from .importers import bulk_create_stops, prepare_stops
+from .network import network_changed
+from tram.serializers import ValuesSerializer
 
 
 class StopSerializer(serializers.ModelSerializer):
@@ -13,12 +18,53 @@ class StopSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug']
 
 
+class StopValuesSerializer(ValuesSerializer):
+    """ StopSerializer output built from values() rows """
+    fields = ['id', 'name', 'slug']
+
+
+class StopImportItemSerializer(serializers.Serializer):
+    name = serializers.CharField()
+
+
+class StopImportSerializer(serializers.Serializer):
+    stops = StopImportItemSerializer(many=True, allow_empty=False)
+
+    def validate(self, data: dict) -> dict:
+        """ Check all stop names for slug collisions and report every collision at once """
+        data = super().validate(data)
+        stops, errors = prepare_stops(stop['name'] for stop in data['stops'])
+        if errors:
+            raise serializers.ValidationError(errors)
+        data['stops'] = stops
+        return data
+
+    def create(self, validated_data: dict) -> List[Stop]:
+        """ Insert all stops with batched bulk_create """
+        return bulk_create_stops(validated_data['stops'])
+
+    def to_representation(self, stops: List[Stop]) -> dict:
+        return {'stops': StopSerializer(stops, many=True).data}
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ['id', 'number', 'name']
 
 
+class RouteValuesSerializer(ValuesSerializer):
+    """ RouteSerializer output built from values() rows of routes annotated by RouteQuerySet.with_name() """
+    fields = ['id', 'number', 'stops_count', 'first_stop_name', 'last_stop_name']
+
+    def to_representation(self, row: dict) -> dict:
+        return {
+            'id': row['id'],
+            'number': row['number'],
+            'name': Route.format_name(row['number'], row['stops_count'], row['first_stop_name'], row['last_stop_name']),
+        }
+
+
 class StopDetailSerializer(StopSerializer):
     routes = RouteSerializer(many=True)
 
@@ -31,12 +77,23 @@ class StopInRouteSerializer(serializers.ModelSerializer):
         fields = ['id']
 
 
+class RouteStopSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='stop.id')
+    name = serializers.CharField(source='stop.name')
+    slug = serializers.SlugField(source='stop.slug')
+
+    class Meta:
+        model = RouteStop
+        fields = ['id', 'name', 'slug', 'offset']
+
+
 class RouteDetailSerializer(serializers.ModelSerializer):
-    stops = StopSerializer(many=True)
+    stops = RouteStopSerializer(source='ordered_route_stops', many=True)
 
     class Meta:
         model = Route
-        fields = ['id', 'number', 'stops', 'name']
+        fields = ['id', 'number', 'stops', 'name', 'duration']
+        read_only_fields = ['duration']
 
 
 class RouteCreationSerializer(serializers.ModelSerializer):
@@ -73,59 +130,132 @@ class RouteCreationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(errors)
         return data
 
+    @transaction.atomic
     def create(self, validated_data: dict) -> Route:
         """ Create new route """
-        route = Route.objects.create(number=validated_data['number'])
-        self.add_stops_in_route(route, self.initial_data['stops'])
+        stop_ids, offsets = self.get_stops_on_route()
+        # Saving route logs network change of the route, which covers its stops inserted below as well
+        route = Route.objects.create(number=validated_data['number'], duration=offsets[-1])
+        self.add_stops_in_route(route, stop_ids, offsets)
         return route
 
+    @transaction.atomic
     def update(self, instance: Route, validated_data: dict) -> Route:
-        """ Update existing route """
-        self.instance.number = validated_data['number']
-        self.instance.save()
-        stops_on_route = RouteStop.objects.filter(route=self.instance)
-        stops_on_route.delete()
-
-        self.add_stops_in_route(self.instance, self.initial_data['stops'])
-        return self.instance
-
-    def add_stops_in_route(self, route: Route, stops: List[Dict]) -> None:
-        """ Create RouteStop objects thus linking route and its stops """
-        route_stops = []
-        try:
-            number_on_route = 1
-            for stop in stops:
-                for key, value in stop.items():
-                    stop = Stop.objects.get(id=value)
-                    route_stop = RouteStop.objects.create(route=route, stop=stop, number_on_route=number_on_route)
-                    route_stop.save()
-                    number_on_route += 1
-        except Exception as e:
-            route.delete()
-            for route_stop in route_stops:
-                route_stop.delete()
-            raise e
+        """ Update existing route, its change is logged once whatever was written """
+        stop_ids, offsets = self.get_stops_on_route()
+        route_changed = instance.number != validated_data['number'] or instance.duration != offsets[-1]
+        if route_changed:
+            instance.number = validated_data['number']
+            instance.duration = offsets[-1]
+            instance.save()
+        stops_changed = self.update_stops_in_route(instance, stop_ids, offsets)
+        # Saving route has logged its change already
+        if stops_changed and not route_changed:
+            network_changed(NetworkChange.Kind.ROUTE, [instance.id])
+        return instance
+
+    def get_stops_on_route(self) -> Tuple[List[int], List[int]]:
+        """ Return validated stop ids of route and travel time from the first stop to each of them """
+        stop_ids = [self.parse_id(stop['id']) for stop in self.initial_data['stops']]
+        return stop_ids, Route.calculate_offsets(stop_ids, self.connection_times)
+
+    def add_stops_in_route(self, route: Route, stop_ids: List[int], offsets: List[int]) -> None:
+        """ Create RouteStop objects thus linking route and its stops. Stop ids are already validated. """
+        RouteStop.objects.bulk_create([
+            RouteStop(route=route, stop_id=stop_id, number_on_route=number_on_route, offset=offset)
+            for number_on_route, (stop_id, offset) in enumerate(zip(stop_ids, offsets), start=1)
+        ])
+
+    def update_stops_in_route(self, route: Route, stop_ids: List[int], offsets: List[int]) -> bool:
+        """
+        Turn current sequence of route stops into requested one with minimal number of writes
+        Stops staying on their place are kept, moved stops are renumbered, the rest is inserted or deleted.
+        Return whether anything was written.
+        """
+        route_stops = list(RouteStop.objects.filter(route=route).order_by('number_on_route'))
+        route_stops_by_number = {route_stop.number_on_route: route_stop for route_stop in route_stops}
+
+        kept_ids = set()
+        updated, unmatched_positions = [], []
+        for number_on_route, (stop_id, offset) in enumerate(zip(stop_ids, offsets), start=1):
+            route_stop = route_stops_by_number.get(number_on_route)
+            if route_stop is not None and route_stop.stop_id == stop_id and route_stop.id not in kept_ids:
+                kept_ids.add(route_stop.id)
+                if route_stop.offset != offset:
+                    route_stop.offset = offset
+                    updated.append(route_stop)
+            else:
+                unmatched_positions.append((number_on_route, stop_id, offset))
+
+        spare_route_stops = defaultdict(deque)
+        for route_stop in route_stops:
+            if route_stop.id not in kept_ids:
+                spare_route_stops[route_stop.stop_id].append(route_stop)
+
+        created = []
+        for number_on_route, stop_id, offset in unmatched_positions:
+            if spare_route_stops[stop_id]:
+                route_stop = spare_route_stops[stop_id].popleft()
+                route_stop.number_on_route = number_on_route
+                route_stop.offset = offset
+                updated.append(route_stop)
+            else:
+                created.append(RouteStop(route=route, stop_id=stop_id, number_on_route=number_on_route, offset=offset))
+        deleted_ids = [route_stop.id for spare in spare_route_stops.values() for route_stop in spare]
+
+        if deleted_ids:
+            RouteStop.objects.filter(id__in=deleted_ids).delete()
+        if updated:
+            RouteStop.objects.bulk_update(updated, ['number_on_route', 'offset'])
+        if created:
+            RouteStop.objects.bulk_create(created)
+        return bool(deleted_ids or updated or created)
 
     def validate_stop_ids(self, stops_data: dict) -> Tuple[bool, list]:
-        """ Verify all stop ids provided for route are valid """
+        """ Verify all stop ids provided for route are valid. All stops are fetched with a single query. """
         errors = []
+        stop_ids = []
         for stop in stops_data:
             for key, value in stop.items():
                 if key != 'id':
                     errors.append({'stops': f'Only stop ids must be included in route creation request: {stop}'})
-                try:
-                    Stop.objects.get(id=value)
-                except Stop.DoesNotExist:
-                    errors.append({'stops': f'Invalid stop id provided: {value}'})
+                stop_ids.append(value)
+
+        existing_ids = set(Stop.objects.filter(id__in=self.parse_ids(stop_ids)).values_list('id', flat=True))
+        for stop_id in stop_ids:
+            if self.parse_id(stop_id) not in existing_ids:
+                errors.append({'stops': f'Invalid stop id provided: {stop_id}'})
         return len(errors) == 0, errors
 
     def validate_stop_connections(self, stops_data: dict) -> Tuple[bool, list]:
-        """ Verify all stops provided for route are connected. Check connection each pair of stops in sequence. """
+        """
+        Verify all stops provided for route are connected. Check connection each pair of stops in sequence.
+        All connections between provided stops are fetched with a single query and kept for offsets calculation.
+        Connections are stored with lower stop id first, so each pair is checked in that order.
+        """
         errors = []
+        stop_ids = self.parse_ids([stop.get('id') for stop in stops_data])
+        self.connection_times = {
+            (stop1_id, stop2_id): time
+            for stop1_id, stop2_id, time in StopConnection.objects.filter(stop1_id__in=stop_ids, stop2_id__in=stop_ids)
+            .values_list('stop1_id', 'stop2_id', 'time')
+        }
+
         for stop1, stop2 in zip(stops_data[:-1], stops_data[1:]):
-            if (
-                    not StopConnection.objects.filter(stop1_id=stop1['id'], stop2_id=stop2['id']).exists() and
-                    not StopConnection.objects.filter(stop1_id=stop2['id'], stop2_id=stop1['id']).exists()
-            ):
-                errors.append({'stops': f'Stops {stop1["id"]} and {stop2["id"]} are not connected'})
+            stop1_id, stop2_id = self.parse_id(stop1.get('id')), self.parse_id(stop2.get('id'))
+            if stop1_id is None or stop2_id is None or \
+                    (min(stop1_id, stop2_id), max(stop1_id, stop2_id)) not in self.connection_times:
+                errors.append({'stops': f'Stops {stop1.get("id")} and {stop2.get("id")} are not connected'})
         return len(errors) == 0, errors
+
+    @staticmethod
+    def parse_id(value) -> Optional[int]:
+        """ Convert stop id from request data to integer, return None if it is not a valid id """
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def parse_ids(self, values: list) -> Set[int]:
+        """ Convert stop ids from request data to integers, skipping invalid ones """
+        return {stop_id for stop_id in map(self.parse_id, values) if stop_id is not None}
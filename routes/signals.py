@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .graph import invalidate_graph
+from .matrix import schedule_travel_time_matrix_rebuild, travel_time_matrix_exists
+from .models import NetworkChange, Route, RouteStop, Stop, StopConnection, Timetable
+from .network import network_changed
+
+
+@receiver(post_save, sender=Stop)
+@receiver(post_delete, sender=Stop)
+@receiver(post_save, sender=StopConnection)
+@receiver(post_delete, sender=StopConnection)
+def stop_network_changed(sender, **kwargs) -> None:
+    """
+    Reload stop graph after stops or connections between them have changed
+    Travel time matrix, if it is used at all, is rebuilt in background once the change is committed. Other processes
+    keep serving the previous matrix until the rebuilt file replaces it.
+    """
+    invalidate_graph()
+    if travel_time_matrix_exists():
+        transaction.on_commit(schedule_travel_time_matrix_rebuild)
+
+
+# Changed model: kind of network change and attribute holding id of changed object.
+# Timetables are part of their route. Stops on route are written in bulk, the code writing them logs
+# the change of their route once (serializer, GTFS import, Route.update_offsets saving the route).
+NETWORK_CHANGES = {
+    Stop: (NetworkChange.Kind.STOP, 'pk'),
+    StopConnection: (NetworkChange.Kind.CONNECTION, 'pk'),
+    Route: (NetworkChange.Kind.ROUTE, 'pk'),
+    Timetable: (NetworkChange.Kind.ROUTE, 'route_id'),
+}
+
+
+def deleted_with_route(origin) -> bool:
+    """ Whether deletion started at a route (or queryset of routes), which logs the change of route itself """
+    return isinstance(origin, Route) or isinstance(origin, QuerySet) and origin.model is Route
+
+
+@receiver(post_save, sender=Stop)
+@receiver(post_delete, sender=Stop)
+@receiver(post_save, sender=StopConnection)
+@receiver(post_delete, sender=StopConnection)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Timetable)
+@receiver(post_delete, sender=Timetable)
+def record_network_change(sender, instance, origin=None, **kwargs) -> None:
+    """ Log write to stops, routes or timetables and invalidate cached network responses """
+    if sender is Timetable and deleted_with_route(origin):
+        return
+    kind, attribute = NETWORK_CHANGES[sender]
+    network_changed(kind, [getattr(instance, attribute)])
+
+
+@receiver(pre_delete, sender=Stop)
+def record_routes_of_deleted_stop(sender, instance: Stop, **kwargs) -> None:
+    """ Log change of routes losing the stop, its stops on route are deleted by cascade without signals """
+    instance.route_ids = set(RouteStop.objects.filter(stop=instance).values_list('route_id', flat=True))
+    network_changed(NetworkChange.Kind.ROUTE, instance.route_ids)
+
+
+@receiver(post_delete, sender=Stop)
+def update_offsets_of_routes_without_stop(sender, instance: Stop, **kwargs) -> None:
+    """ Recalculate offsets of routes which lost the stop, their neighbouring stops are now adjacent """
+    Route.objects.filter(id__in=getattr(instance, 'route_ids', ())).update_offsets()
+
+
+@receiver(post_save, sender=StopConnection)
+@receiver(post_delete, sender=StopConnection)
+def update_route_offsets(sender, instance: StopConnection, **kwargs) -> None:
+    """ Keep offsets of routes passing both stops of connection in sync with its travel time """
+    Route.objects.filter(stops=instance.stop1_id).filter(stops=instance.stop2_id).distinct().update_offsets()
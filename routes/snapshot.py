@@ -0,0 +1,123 @@
+import gzip
+import re
+from typing import Callable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+from django.views.decorators.http import condition
+from rest_framework.renderers import BaseRenderer
+from rest_framework.request import Request
+
+from .models import NetworkChange, Route, RouteStop, Stop, StopConnection
+from .network import get_network_version, network_etag, network_last_modified
+
+NETWORK_SNAPSHOT_KEY = 'routes:network-snapshot:{version}:{format}'
+
+re_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def build_routes(routes: QuerySet, stop_reference: Callable[[int], Optional[int]] = int) -> List[list]:
+    """
+    Return routes as [id, number, duration, [stops in order], [offsets of stops]], stops given by stop_reference
+    Stops without reference and routes created after routes were read are left out
+    """
+    rows = {route_id: [route_id, number, duration, [], []]
+            for route_id, number, duration in routes.order_by('number').values_list('id', 'number', 'duration')}
+    route_stops = RouteStop.objects.filter(route__in=routes).order_by('route_id', 'number_on_route')
+    for route_id, stop_id, offset in route_stops.values_list('route_id', 'stop_id', 'offset'):
+        reference = stop_reference(stop_id)
+        if route_id in rows and reference is not None:
+            rows[route_id][3].append(reference)
+            rows[route_id][4].append(offset)
+    return list(rows.values())
+
+
+def build_network_snapshot() -> dict:
+    """
+    Whole network in compact form, stops are referenced by their position in "stops"
+      stops: [id, name, slug]
+      connections: [id, stop index, stop index, time]
+      routes: [id, number, duration, [stop indexes in order], [offsets of stops]]
+    Without repeatable reads later queries may see stops created after "stops" was read, their connections
+    and route stops are left out, clients get them with the changes since "version"
+    """
+    with transaction.atomic():
+        version = get_network_version()
+        stops = list(Stop.objects.order_by('id').values_list('id', 'name', 'slug'))
+        index_by_id = {stop_id: index for index, (stop_id, _, _) in enumerate(stops)}
+
+        connections = StopConnection.objects.order_by('id').values_list('id', 'stop1_id', 'stop2_id', 'time')
+        return {
+            'version': version,
+            'stops': [list(stop) for stop in stops],
+            'connections': [
+                [connection_id, index_by_id[stop1_id], index_by_id[stop2_id], time]
+                for connection_id, stop1_id, stop2_id, time in connections
+                if stop1_id in index_by_id and stop2_id in index_by_id
+            ],
+            'routes': build_routes(Route.objects.all(), index_by_id.get),
+        }
+
+
+def build_network_changes(since: int) -> dict:
+    """
+    Stops, connections and routes changed after network version "since", in the form of the snapshot
+    except that stops are referenced by id. Changed objects no longer existing are listed as deleted.
+    Changes are found with one range query over the change log, changed objects are fetched only if there are any.
+    """
+    version = since
+    changed = {kind: set() for kind in NetworkChange.Kind}
+    changes = NetworkChange.objects.filter(version__gt=since).values_list('version', 'kind', 'object_id')
+    for change_version, kind, object_id in changes:
+        version = max(version, change_version)
+        changed[kind].add(object_id)
+
+    stops = connections = routes = []
+    if changed[NetworkChange.Kind.STOP]:
+        stops = Stop.objects.filter(id__in=changed[NetworkChange.Kind.STOP]).order_by('id')
+        stops = [list(stop) for stop in stops.values_list('id', 'name', 'slug')]
+    if changed[NetworkChange.Kind.CONNECTION]:
+        connections = StopConnection.objects.filter(id__in=changed[NetworkChange.Kind.CONNECTION]).order_by('id')
+        connections = [list(connection) for connection in connections.values_list('id', 'stop1_id', 'stop2_id', 'time')]
+    if changed[NetworkChange.Kind.ROUTE]:
+        routes = build_routes(Route.objects.filter(id__in=changed[NetworkChange.Kind.ROUTE]))
+
+    def changes(kind: int, upserted: List[list]) -> dict:
+        return {'upserted': upserted, 'deleted': sorted(changed[kind] - {row[0] for row in upserted})}
+
+    return {
+        'version': version,
+        'stops': changes(NetworkChange.Kind.STOP, stops),
+        'connections': changes(NetworkChange.Kind.CONNECTION, connections),
+        'routes': changes(NetworkChange.Kind.ROUTE, routes),
+    }
+
+
+def get_network_snapshot(renderer: BaseRenderer) -> Tuple[bytes, bytes]:
+    """
+    Return network snapshot rendered by renderer, plain and gzip compressed
+    Both are built once per network version and format, then served from cache
+    """
+    key = NETWORK_SNAPSHOT_KEY.format(version=get_network_version(), format=renderer.format)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        content = renderer.render(build_network_snapshot())
+        snapshot = content, gzip.compress(content, mtime=0)
+        cache.set(key, snapshot, settings.NETWORK_CACHE_TIMEOUT)
+    return snapshot
+
+
+def accepts_gzip(request: Request) -> bool:
+    """ Whether client accepts gzip encoded response """
+    return bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
+
+def network_snapshot_etag(request: Request, *args, **kwargs) -> str:
+    """ ETag of network snapshot, gzip encoded snapshot is a different representation of it """
+    etag = network_etag(request, *args, **kwargs)
+    return f'{etag}-gzip' if accepts_gzip(request) else etag
+
+
+network_snapshot_conditional = condition(etag_func=network_snapshot_etag, last_modified_func=network_last_modified)
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.models import Route, RouteStop, Stop, StopConnection
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_CACHES, ROOT_URLCONF='tram.async_urls')
+class TestAsyncViews(TestCase):
+    """ Async read path answers JSON GET requests, "format" query parameter sends them to the sync views """
+
+    def setUp(self):
+        self.stops = [Stop.objects.create(name=f'stop {number}') for number in range(1, 5)]
+        for stop1, stop2 in zip(self.stops[:-1], self.stops[1:]):
+            StopConnection.objects.create(stop1=stop1, stop2=stop2, time=3)
+        for number, stops in [(1, self.stops), (2, self.stops[2:0:-1]), (3, [])]:
+            route = Route.objects.create(number=number)
+            for number_on_route, stop in enumerate(stops, 1):
+                RouteStop.objects.create(route=route, stop=stop, number_on_route=number_on_route)
+            route.update_offsets()
+        self.client = APIClient()
+
+    def assertSameAsSyncView(self, path: str):
+        response = self.client.get(path)
+        sync_response = self.client.get(path, {'format': 'json'})
+        self.assertEqual(response.status_code, sync_response.status_code)
+        self.assertEqual(response['Content-Type'], sync_response['Content-Type'])
+        self.assertEqual(response.content, sync_response.content)
+        self.assertFalse(hasattr(response, 'data'), 'response was not served by async view')
+
+    def test_stop_list(self):
+        self.assertSameAsSyncView('/api/v1/tram/stops/')
+
+    def test_stop_details(self):
+        self.assertSameAsSyncView(f'/api/v1/tram/stops/{self.stops[1].slug}/')
+
+    def test_route_list(self):
+        self.assertSameAsSyncView('/api/v1/tram/routes/')
+
+    def test_route_details(self):
+        for number in (1, 2, 3):
+            self.assertSameAsSyncView(f'/api/v1/tram/routes/{number}/')
+
+    def test_not_found_left_to_sync_view(self):
+        self.assertEqual(self.client.get('/api/v1/tram/stops/unknown/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/tram/routes/42/').status_code, 404)
+        self.assertEqual(self.client.get('/api/v1/tram/routes/abc/').status_code, 404)
+
+    def test_search_and_pagination_left_to_sync_view(self):
+        response = self.client.get('/api/v1/tram/stops/', {'q': 'stop 2'})
+        self.assertEqual(response.data[0]['slug'], self.stops[1].slug)
+        response = self.client.get('/api/v1/tram/routes/', {'page_size': 1})
+        self.assertEqual([route['number'] for route in response.data['results']], [1])
+
+    def test_browsable_api_left_to_sync_view(self):
+        response = self.client.get('/api/v1/tram/routes/', HTTP_ACCEPT='text/html')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+
+    def test_write_passes_to_sync_view(self):
+        admin = get_user_model().objects.create_user(
+            username='test-admin', password='test-password', email='test-admin@example.com', is_staff=True,
+        )
+        self.client.force_authenticate(admin)
+        route_data = {'number': 4, 'stops': [{'id': self.stops[0].id}, {'id': self.stops[1].id}]}
+        response = self.client.post('/api/v1/tram/routes/', route_data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.delete('/api/v1/tram/routes/4/').status_code, 401)
+
+
+@override_settings(CACHES=settings.TEST_LOCMEM_CACHES, ROOT_URLCONF='tram.async_urls',
+                   NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestAsyncViewsCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Stop.objects.create(name='stop 1')
+        self.client = APIClient()
+
+    def test_conditional_request(self):
+        etag = self.client.get('/api/v1/tram/stops/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/stops/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_response_shared_with_sync_view(self):
+        self.client.get('/api/v1/tram/routes/', HTTP_ACCEPT='text/html')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/routes/')
+        self.assertEqual(response.json(), [])
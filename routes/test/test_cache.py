@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+import django
+import os
+
+from routes.models import NetworkChange, Stop, StopConnection, Route, RouteStop
+from routes.network import get_network_version, network_changed
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_LOCMEM_CACHES, NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestNetworkCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.stop1 = Stop.objects.create(name='stop 1')
+        self.stop2 = Stop.objects.create(name='stop 2')
+        self.stop3 = Stop.objects.create(name='stop 3')
+        StopConnection.objects.create(stop1=self.stop1, stop2=self.stop2)
+        StopConnection.objects.create(stop1=self.stop2, stop2=self.stop3)
+
+        self.route = Route.objects.create(number=1)
+        RouteStop.objects.bulk_create([
+            RouteStop(route=self.route, stop=self.stop1, number_on_route=1),
+            RouteStop(route=self.route, stop=self.stop2, number_on_route=2),
+        ])
+
+        self.admin = get_user_model().objects.create_user(
+            username='test-admin', password='test-password', email='test-admin@example.com',
+            is_staff=True,
+        )
+        self.admin_client = APIClient()
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.admin).key)
+        self.client = APIClient()
+
+    def test_cached_response_does_not_query_database(self):
+        self.client.get('/api/v1/tram/routes/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/routes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['name'], 'stop 1 - stop 2')
+
+    def test_write_bumps_network_version(self):
+        version = get_network_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Stop.objects.create(name='stop 4')
+        self.assertGreater(get_network_version(), version)
+
+    def test_write_of_other_process_seen_after_version_ttl(self):
+        version = get_network_version()
+        # Change logged by another process doesn't touch memoized version of this one
+        with mock.patch('routes.network.invalidate_network_state'):
+            network_changed(NetworkChange.Kind.STOP, [self.stop1.id])
+        self.assertEqual(get_network_version(), version)
+        with override_settings(NETWORK_VERSION_TTL=0):
+            self.assertEqual(get_network_version(), version + 1)
+
+    def test_route_update_is_visible_immediately(self):
+        self.assertEqual(self.client.get('/api/v1/tram/routes/1/').json()['name'], 'stop 1 - stop 2')
+
+        route_data = {'number': 1, 'stops': [{'id': self.stop1.id}, {'id': self.stop2.id}, {'id': self.stop3.id}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.put('/api/v1/tram/routes/1/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/v1/tram/routes/1/').json()['name'], 'stop 1 - stop 3')
+        self.assertEqual(self.client.get('/api/v1/tram/routes/').json()[0]['name'], 'stop 1 - stop 3')
+
+    def test_stop_rename_is_visible_immediately(self):
+        self.assertEqual(self.client.get('/api/v1/tram/stops/').json()[0]['name'], 'stop 1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.admin_client.put(f'/api/v1/tram/stops/{self.stop1.slug}/', data={'name': 'stop 1 new'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get('/api/v1/tram/stops/').json()[0]['name'], 'stop 1 new')
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get('/api/v1/tram/stops/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response.headers)
+        self.assertIn('Last-Modified', response.headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/stops/', HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_changes_after_write(self):
+        etag = self.client.get('/api/v1/tram/routes/').headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Route.objects.create(number=2)
+
+        response = self.client.get('/api/v1/tram/routes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_etag_differs_between_endpoints(self):
+        stops_etag = self.client.get('/api/v1/tram/stops/').headers['ETag']
+        routes_etag = self.client.get('/api/v1/tram/routes/').headers['ETag']
+        self.assertNotEqual(stops_etag, routes_etag)
+
+        response = self.client.get('/api/v1/tram/routes/', HTTP_IF_NONE_MATCH=stops_etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,133 @@
+from datetime import date, time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.graph import get_graph, invalidate_graph
+from routes.models import Route, RouteStop, Stop, StopConnection, Timetable
+from routes.timetable import MINUTES_IN_DAY, get_departure_index, invalidate_departure_index
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+MONDAY = date(2026, 10, 19)
+FRIDAY = date(2026, 10, 23)
+
+
+@override_settings(NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestDepartures(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        invalidate_graph()
+        invalidate_departure_index()
+        self.stops = [Stop.objects.create(name=f'stop {number}') for number in range(1, 4)]
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[1], time=5)
+        StopConnection.objects.create(stop1=self.stops[1], stop2=self.stops[2], time=3)
+        self.route = Route.objects.create(number=1)
+        for number, stop in enumerate(self.stops, 1):
+            RouteStop.objects.create(route=self.route, stop=stop, number_on_route=number)
+        self.route.update_offsets()
+        self.client = APIClient()
+
+    def create_timetable(self, service_days: int, first: time, last: time, headway: int, route: Route = None):
+        return Timetable.objects.create(route=route or self.route, service_days=service_days,
+                                        first_departure=first, last_departure=last, headway=headway)
+
+    def test_departures_shifted_by_stop_offset(self):
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6), time(8), 15)
+        departures = get_departure_index().next_departures(self.stops[1].id, MONDAY, 6 * 60 + 6, limit=3)
+        self.assertEqual(departures, [(6 * 60 + 20, 1), (6 * 60 + 35, 1), (6 * 60 + 50, 1)])
+
+    def test_no_departures_after_last_one(self):
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6), time(8), 15)
+        departures = get_departure_index().next_departures(self.stops[2].id, FRIDAY, 8 * 60, limit=5)
+        self.assertEqual(departures, [(8 * 60 + 8, 1)])
+
+    def test_departures_of_routes_merged_in_order(self):
+        route2 = Route.objects.create(number=2)
+        RouteStop.objects.create(route=route2, stop=self.stops[1], number_on_route=1)
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6), time(8), 20)
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6, 10), time(8), 20, route=route2)
+        departures = get_departure_index().next_departures(self.stops[1].id, MONDAY, 6 * 60, limit=4)
+        self.assertEqual(departures, [(6 * 60 + 5, 1), (6 * 60 + 10, 2), (6 * 60 + 25, 1), (6 * 60 + 30, 2)])
+
+    def test_service_days(self):
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6), time(8), 15)
+        self.create_timetable(Timetable.ServiceDays.SUNDAY, time(9), time(10), 30)
+        departures = get_departure_index().next_departures(self.stops[0].id, date(2026, 10, 18), 0, limit=3)
+        self.assertEqual(departures, [(9 * 60, 1), (9 * 60 + 30, 1), (10 * 60, 1)])
+        saturday = get_departure_index().next_departures(self.stops[0].id, date(2026, 10, 17), 0, limit=1)
+        self.assertEqual(saturday, [(MINUTES_IN_DAY + 9 * 60, 1)])
+        self.assertEqual(get_departure_index().next_departures(self.stops[0].id, FRIDAY, 9 * 60), [])
+
+    def test_late_departures_of_previous_day(self):
+        self.create_timetable(Timetable.ServiceDays.SUNDAY, time(23, 55), time(23, 55), 10)
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(5), time(5), 10)
+        departures = get_departure_index().next_departures(self.stops[2].id, MONDAY, 0, limit=2)
+        self.assertEqual(departures, [(3, 1), (5 * 60 + 8, 1)])
+
+    def test_departures_of_next_day(self):
+        self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(5), time(23), 60)
+        index = get_departure_index()
+        departures = index.next_departures(self.stops[0].id, MONDAY, 23 * 60 + 30, limit=2)
+        self.assertEqual(departures, [(MINUTES_IN_DAY + 5 * 60, 1), (MINUTES_IN_DAY + 6 * 60, 1)])
+        departures = index.next_departures(self.stops[0].id, MONDAY, 22 * 60 + 30, limit=3)
+        self.assertEqual(departures, [(23 * 60, 1), (MINUTES_IN_DAY + 5 * 60, 1), (MINUTES_IN_DAY + 6 * 60, 1)])
+
+    def test_index_reloaded_after_timetable_change(self):
+        timetable = self.create_timetable(Timetable.ServiceDays.WEEKDAYS, time(6), time(8), 15)
+        self.assertEqual(len(get_departure_index().next_departures(self.stops[0].id, FRIDAY, 0, limit=20)), 9)
+        timetable.headway = 30
+        with self.captureOnCommitCallbacks(execute=True):
+            timetable.save()
+        self.assertEqual(len(get_departure_index().next_departures(self.stops[0].id, FRIDAY, 0, limit=20)), 5)
+
+    def test_invalid_timetable(self):
+        timetable = Timetable(route=self.route, service_days=Timetable.ServiceDays.WEEKDAYS,
+                              first_departure=time(8), last_departure=time(6), headway=0)
+        with self.assertRaises(ValidationError):
+            timetable.full_clean()
+
+    def test_departures_endpoint(self):
+        for service_days in Timetable.ServiceDays:
+            self.create_timetable(service_days, time(6), time(8), 15)
+        response = self.client.get(f'/api/v1/tram/stops/{self.stops[1].slug}/departures/',
+                                   {'time': '07:50', 'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'stop': self.stops[1].slug,
+            'time': '07:50',
+            'departures': [
+                {'route': 1, 'time': '07:50', 'minutes': 0},
+                {'route': 1, 'time': '08:05', 'minutes': 15},
+                {'route': 1, 'time': '06:05', 'minutes': 22 * 60 + 15},
+            ],
+        })
+
+    def test_departures_endpoint_across_midnight(self):
+        for service_days in Timetable.ServiceDays:
+            self.create_timetable(service_days, time(5), time(5), 10)
+        response = self.client.get(f'/api/v1/tram/stops/{self.stops[0].slug}/departures/', {'time': '23:30'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['departures'], [{'route': 1, 'time': '05:00', 'minutes': 5 * 60 + 30}])
+
+    def test_departures_endpoint_does_not_query_database(self):
+        get_graph()
+        get_departure_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/v1/tram/stops/{self.stops[0].slug}/departures/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_departures_of_unknown_stop(self):
+        response = self.client.get('/api/v1/tram/stops/unknown/departures/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_departures_with_invalid_time(self):
+        response = self.client.get(f'/api/v1/tram/stops/{self.stops[0].slug}/departures/', {'time': '25:00'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,165 @@
+from io import StringIO
+import tempfile
+import zipfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+import django
+import os
+
+from routes.models import Stop, StopConnection, Route, RouteStop
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+GTFS_FEED = {
+    'stops.txt': [
+        'stop_id,stop_name,location_type,parent_station',
+        'S1,Central Station,1,',
+        'S1A,Central Station Platform A,0,S1',
+        'S2,Park,0,',
+        'S3,Museum,0,',
+        'S4,Old Town,0,',
+    ],
+    'routes.txt': [
+        'route_id,route_short_name,route_long_name,route_type',
+        'R1,1,Central - Museum,0',
+        'R2,2,Park - Old Town,0',
+        'RX,Express,Airport express,0',
+    ],
+    'trips.txt': [
+        'route_id,service_id,trip_id',
+        'R1,weekday,T1',
+        'R1,weekday,T2',
+        'R2,weekday,T3',
+        'RX,weekday,T4',
+    ],
+    'stop_times.txt': [
+        'trip_id,arrival_time,departure_time,stop_id,stop_sequence',
+        'T1,08:00:00,08:00:00,S1A,1',
+        'T1,08:02:00,08:02:00,S2,2',
+        'T1,08:05:00,08:05:00,S3,3',
+        'T2,25:00:00,25:00:00,S1A,1',
+        'T2,25:04:00,25:04:00,S2,2',
+        'T2,25:07:00,25:07:00,S3,3',
+        'T3,09:03:00,09:03:00,S4,2',
+        'T3,09:00:00,09:00:00,S2,1',
+        'T4,10:00:00,10:00:00,S1,1',
+        'T4,10:30:00,10:30:00,S4,2',
+    ],
+}
+
+
+class TestGTFS(TestCase):
+
+    def setUp(self):
+        self.existing_stop = Stop.objects.create(name='Park')
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_feed(self, feed: dict) -> str:
+        path = os.path.join(self.directory.name, 'feed.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, lines in feed.items():
+                archive.writestr(name, '\n'.join(lines) + '\n')
+        return path
+
+    def get_route_stop_names(self, number: int) -> list:
+        return list(RouteStop.objects.filter(route__number=number).order_by('number_on_route')
+                    .values_list('stop__name', flat=True))
+
+    def get_connection_time(self, stop1: Stop, stop2: Stop) -> int:
+        connection = StopConnection.objects.get(stop1__in=[stop1, stop2], stop2__in=[stop1, stop2])
+        return connection.time
+
+    def test_import_gtfs(self):
+        call_command('import_gtfs', self.write_feed(GTFS_FEED), batch_size=2, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(set(Stop.objects.values_list('name', flat=True)),
+                         {'Central Station', 'Park', 'Museum', 'Old Town'})
+        self.assertEqual(Stop.objects.get(name='Park').id, self.existing_stop.id)
+        self.assertEqual(set(Route.objects.values_list('number', flat=True)), {1, 2})
+        self.assertEqual(self.get_route_stop_names(1), ['Central Station', 'Park', 'Museum'])
+        self.assertEqual(self.get_route_stop_names(2), ['Park', 'Old Town'])
+
+        central, park, museum, old_town = (Stop.objects.get(name=name)
+                                           for name in ('Central Station', 'Park', 'Museum', 'Old Town'))
+        self.assertEqual(self.get_connection_time(central, park), 3)
+        self.assertEqual(self.get_connection_time(park, museum), 3)
+        self.assertEqual(self.get_connection_time(park, old_town), 3)
+        self.assertEqual(StopConnection.objects.count(), 3)
+
+    def test_import_gtfs_replaces_route_stops(self):
+        route = Route.objects.create(number=1)
+        museum = Stop.objects.create(name='Museum')
+        RouteStop.objects.create(route=route, stop=museum, number_on_route=1)
+
+        call_command('import_gtfs', self.write_feed(GTFS_FEED), stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Route.objects.get(number=1).id, route.id)
+        self.assertEqual(self.get_route_stop_names(1), ['Central Station', 'Park', 'Museum'])
+
+    def test_import_gtfs_updates_offsets_of_other_routes(self):
+        museum = Stop.objects.create(name='Museum')
+        StopConnection.objects.create(stop1=self.existing_stop, stop2=museum, time=10)
+        route = Route.objects.create(number=5)
+        RouteStop.objects.create(route=route, stop=self.existing_stop, number_on_route=1)
+        RouteStop.objects.create(route=route, stop=museum, number_on_route=2)
+        route.update_offsets()
+
+        call_command('import_gtfs', self.write_feed(GTFS_FEED), stdout=StringIO(), stderr=StringIO())
+        route.refresh_from_db()
+        self.assertEqual(route.duration, 3)
+
+    def test_import_invalid_gtfs(self):
+        feed = {name: lines for name, lines in GTFS_FEED.items() if name != 'trips.txt'}
+        with self.assertRaises(CommandError):
+            call_command('import_gtfs', self.write_feed(feed), stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Stop.objects.count(), 1)
+
+    def test_import_gtfs_with_duplicate_route_number(self):
+        feed = {**GTFS_FEED, 'routes.txt': GTFS_FEED['routes.txt'] + ['R3,01,Central - Old Town,0']}
+        with self.assertRaisesMessage(CommandError, 'routes R1 and R3 have the same route_short_name 01'):
+            call_command('import_gtfs', self.write_feed(feed), stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(RouteStop.objects.exists())
+
+    def test_export_gtfs(self):
+        call_command('import_gtfs', self.write_feed(GTFS_FEED), stdout=StringIO(), stderr=StringIO())
+        path = os.path.join(self.directory.name, 'export.zip')
+        call_command('export_gtfs', path, stdout=StringIO())
+
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(set(archive.namelist()), {
+                'agency.txt', 'calendar.txt', 'stops.txt', 'routes.txt', 'trips.txt', 'stop_times.txt',
+            })
+            agency = archive.read('agency.txt').decode().splitlines()
+            calendar = archive.read('calendar.txt').decode().splitlines()
+            stops = archive.read('stops.txt').decode().splitlines()
+            trips = archive.read('trips.txt').decode().splitlines()
+            stop_times = archive.read('stop_times.txt').decode().splitlines()
+
+        self.assertEqual(agency[1], 'tram,Tram,https://example.com/,UTC')
+        self.assertTrue(calendar[1].startswith('daily,1,1,1,1,1,1,1,'))
+        self.assertEqual({trip.split(',')[1] for trip in trips[1:]}, {'daily'})
+        self.assertEqual(stops[0], 'stop_id,stop_name,stop_code,stop_lat,stop_lon')
+        self.assertTrue(all(stop.endswith(',0.0,0.0') for stop in stops[1:]))
+
+        central, park, museum = (Stop.objects.get(name=name) for name in ('Central Station', 'Park', 'Museum'))
+        self.assertEqual(stop_times[1:4], [
+            f'route-1,00:00:00,00:00:00,{central.id},1',
+            f'route-1,00:03:00,00:03:00,{park.id},2',
+            f'route-1,00:06:00,00:06:00,{museum.id},3',
+        ])
+
+    def test_export_and_import_round_trip(self):
+        call_command('import_gtfs', self.write_feed(GTFS_FEED), stdout=StringIO(), stderr=StringIO())
+        path = os.path.join(self.directory.name, 'export.zip')
+        call_command('export_gtfs', path, stdout=StringIO())
+        route_stops = {number: self.get_route_stop_names(number) for number in (1, 2)}
+
+        RouteStop.objects.all().delete()
+        StopConnection.objects.all().delete()
+        call_command('import_gtfs', path, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual({number: self.get_route_stop_names(number) for number in (1, 2)}, route_stops)
+        self.assertEqual(StopConnection.objects.count(), 3)
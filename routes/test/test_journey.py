@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.graph import get_graph, invalidate_graph
+from routes.models import Stop, StopConnection
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestJourney(TestCase):
+
+    def setUp(self):
+        invalidate_graph()
+        self.stops = [Stop.objects.create(name=f'stop {number}') for number in range(1, 6)]
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[1], time=2)
+        StopConnection.objects.create(stop1=self.stops[1], stop2=self.stops[2], time=2)
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[2], time=10)
+        StopConnection.objects.create(stop1=self.stops[3], stop2=self.stops[2], time=3)
+        self.client = APIClient()
+
+    def get_journey(self, stop_from: Stop, stop_to: Stop):
+        return self.client.get('/api/v1/tram/journey/', {'from': stop_from.slug, 'to': stop_to.slug})
+
+    def test_fastest_journey(self):
+        response = self.get_journey(self.stops[0], self.stops[3])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['time'], 7)
+        self.assertEqual([stop['id'] for stop in response.data['stops']],
+                         [self.stops[0].id, self.stops[1].id, self.stops[2].id, self.stops[3].id])
+
+    def test_journey_against_connection_direction(self):
+        response = self.get_journey(self.stops[3], self.stops[0])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['time'], 7)
+
+    def test_journey_to_same_stop(self):
+        response = self.get_journey(self.stops[1], self.stops[1])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['time'], 0)
+        self.assertEqual(len(response.data['stops']), 1)
+
+    def test_journey_does_not_query_database(self):
+        get_graph()
+        with self.assertNumQueries(0):
+            response = self.get_journey(self.stops[0], self.stops[3])
+        self.assertEqual(response.status_code, 200)
+
+    def test_journey_between_not_connected_stops(self):
+        response = self.get_journey(self.stops[0], self.stops[4])
+        self.assertEqual(response.status_code, 404)
+
+    def test_journey_with_unknown_stop(self):
+        response = self.client.get('/api/v1/tram/journey/', {'from': self.stops[0].slug, 'to': 'unknown'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_journey_without_parameters(self):
+        response = self.client.get('/api/v1/tram/journey/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_graph_reloaded_after_connection_change(self):
+        self.assertEqual(self.get_journey(self.stops[0], self.stops[4]).status_code, 404)
+        StopConnection.objects.create(stop1=self.stops[3], stop2=self.stops[4], time=1)
+        response = self.get_journey(self.stops[0], self.stops[4])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['time'], 8)
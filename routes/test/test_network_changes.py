@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.models import NetworkChange, Stop, StopConnection, Route, RouteStop
+from routes.network import get_network_version, network_changed
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_LOCMEM_CACHES, NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestNetworkChanges(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stop1 = Stop.objects.create(name='stop 1')
+            self.stop2 = Stop.objects.create(name='stop 2')
+            self.connection = StopConnection.objects.create(stop1=self.stop1, stop2=self.stop2, time=4)
+            self.route = Route.objects.create(number=3)
+            RouteStop.objects.create(route=self.route, stop=self.stop1, number_on_route=1)
+            RouteStop.objects.create(route=self.route, stop=self.stop2, number_on_route=2)
+            self.route.update_offsets()
+        self.version = get_network_version()
+        self.admin = get_user_model().objects.create_user(
+            username='test-admin', password='test-password', email='test-admin@example.com', is_staff=True,
+        )
+        self.client = APIClient()
+
+    def get_changes(self, since: int) -> dict:
+        response = self.client.get('/api/v1/tram/network/changes/', {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_write_increments_version(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stop1.name = 'stop 1a'
+            self.stop1.save()
+        self.assertEqual(get_network_version(), self.version + 1)
+
+    def test_no_changes(self):
+        with self.assertNumQueries(1):
+            changes = self.get_changes(self.version)
+        self.assertEqual(changes, {
+            'version': self.version,
+            'stops': {'upserted': [], 'deleted': []},
+            'connections': {'upserted': [], 'deleted': []},
+            'routes': {'upserted': [], 'deleted': []},
+        })
+
+    def test_all_changes(self):
+        changes = self.get_changes(0)
+        self.assertEqual(changes['version'], self.version)
+        self.assertEqual(changes['stops']['upserted'], [[self.stop1.id, 'stop 1', 'stop-1'],
+                                                        [self.stop2.id, 'stop 2', 'stop-2']])
+        self.assertEqual(changes['connections']['upserted'], [[self.connection.id, self.stop1.id, self.stop2.id, 4]])
+        self.assertEqual(changes['routes']['upserted'], [[self.route.id, 3, 4, [self.stop1.id, self.stop2.id], [0, 4]]])
+
+    def test_updated_stop(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stop2.name = 'stop 2a'
+            self.stop2.save()
+        changes = self.get_changes(self.version)
+        self.assertEqual(changes['version'], get_network_version())
+        self.assertEqual(changes['stops'], {'upserted': [[self.stop2.id, 'stop 2a', 'stop-2a']], 'deleted': []})
+        self.assertEqual(changes['routes'], {'upserted': [], 'deleted': []})
+
+    def test_changed_stops_on_route(self):
+        stop3 = Stop.objects.create(name='stop 3')
+        StopConnection.objects.create(stop1=self.stop2, stop2=stop3, time=2)
+        version = get_network_version()
+        self.client.force_authenticate(self.admin)
+        response = self.client.put(f'/api/v1/tram/routes/{self.route.number}/', {
+            'number': 3, 'stops': [{'id': self.stop1.id}, {'id': self.stop2.id}, {'id': stop3.id}]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        changes = self.get_changes(version)
+        self.assertEqual(changes['routes']['upserted'],
+                         [[self.route.id, 3, 6, [self.stop1.id, self.stop2.id, stop3.id], [0, 4, 6]]])
+
+    def test_deleted_route(self):
+        route_id = self.route.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route.delete()
+        changes = self.get_changes(self.version)
+        self.assertEqual(changes['routes'], {'upserted': [], 'deleted': [route_id]})
+
+    def test_route_with_many_stops_logged_once(self):
+        stops = Stop.objects.bulk_create([Stop(name=f'stop {i}', slug=f'stop-{i}') for i in range(3, 43)])
+        RouteStop.objects.bulk_create([RouteStop(route=self.route, stop=stop, number_on_route=number)
+                                       for number, stop in enumerate(stops, start=3)])
+        with self.assertNumQueries(6), self.captureOnCommitCallbacks(execute=True):
+            self.route.delete()
+        self.assertEqual(NetworkChange.objects.filter(version__gt=self.version).count(), 1)
+
+    def test_changes_follow_version_not_id(self):
+        # Change committed late by a concurrent transaction: its id is higher, its version is not newer
+        NetworkChange.objects.create(kind=NetworkChange.Kind.STOP, object_id=self.stop1.id, version=self.version)
+        self.assertEqual(self.get_changes(self.version)['stops']['upserted'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stop2.name = 'stop 2a'
+            self.stop2.save()
+        changes = self.get_changes(self.version)
+        self.assertEqual(changes['version'], self.version + 1)
+        self.assertEqual([stop[0] for stop in changes['stops']['upserted']], [self.stop2.id])
+
+    def test_deleted_stop(self):
+        stop_id, connection_id = self.stop2.id, self.connection.id
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stop2.delete()
+        changes = self.get_changes(self.version)
+        self.assertEqual(changes['stops']['deleted'], [stop_id])
+        self.assertEqual(changes['connections']['deleted'], [connection_id])
+        self.assertEqual(changes['routes']['upserted'][0][3], [self.stop1.id])
+
+    def test_imported_stops(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/v1/tram/stops-import/',
+                                        {'stops': [{'name': 'stop 3'}, {'name': 'stop 4'}]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        changes = self.get_changes(self.version)
+        self.assertEqual([stop[1] for stop in changes['stops']['upserted']], ['stop 3', 'stop 4'])
+
+    def test_version_served_by_other_process(self):
+        with mock.patch('routes.network.invalidate_network_state'):
+            network_changed(NetworkChange.Kind.STOP, [self.stop1.id])
+        self.assertEqual(get_network_version(), self.version)
+        self.assertEqual(self.get_changes(self.version + 1)['version'], self.version + 1)
+
+    def test_invalid_version(self):
+        for since in ['', 'abc', -1, self.version + 1]:
+            response = self.client.get('/api/v1/tram/network/changes/', {'since': since})
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/tram/network/changes/')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,93 @@
+import gzip
+import json
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.models import Stop, StopConnection, Route, RouteStop
+from routes.network import get_network_version
+from routes.snapshot import build_network_snapshot
+from tram.renderers import msgpack
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_LOCMEM_CACHES, NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestNetworkSnapshot(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.stops = [Stop.objects.create(name=f'stop {number}') for number in range(1, 4)]
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[1], time=2)
+        StopConnection.objects.create(stop1=self.stops[1], stop2=self.stops[2], time=3)
+        self.route = Route.objects.create(number=7)
+        RouteStop.objects.create(route=self.route, stop=self.stops[2], number_on_route=1)
+        RouteStop.objects.create(route=self.route, stop=self.stops[1], number_on_route=2)
+        RouteStop.objects.create(route=self.route, stop=self.stops[0], number_on_route=3)
+        self.route.update_offsets()
+        self.client = APIClient()
+
+    def test_snapshot(self):
+        connection, connection2 = StopConnection.objects.order_by('id')
+        response = self.client.get('/api/v1/tram/network/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {
+            'version': get_network_version(),
+            'stops': [[stop.id, stop.name, stop.slug] for stop in self.stops],
+            'connections': [[connection.id, 0, 1, 2], [connection2.id, 1, 2, 3]],
+            'routes': [[self.route.id, 7, 5, [2, 1, 0], [0, 3, 5]]],
+        })
+
+    def test_snapshot_without_stop_created_while_building(self):
+        def read_stops_then_create_stop(*fields):
+            stops = list(Stop.objects.order_by('id').values_list(*fields))
+            stop = Stop.objects.create(name='stop 4')
+            StopConnection.objects.create(stop1=self.stops[2], stop2=stop, time=4)
+            RouteStop.objects.create(route=self.route, stop=stop, number_on_route=4, offset=9)
+            return stops
+
+        with mock.patch('routes.snapshot.Stop') as stop_model:
+            stop_model.objects.order_by.return_value.values_list.side_effect = read_stops_then_create_stop
+            snapshot = build_network_snapshot()
+        self.assertEqual(len(snapshot['stops']), 3)
+        self.assertEqual(len(snapshot['connections']), 2)
+        self.assertEqual(snapshot['routes'], [[self.route.id, 7, 5, [2, 1, 0], [0, 3, 5]]])
+
+    def test_gzip_encoded_snapshot(self):
+        plain = self.client.get('/api/v1/tram/network/')
+        response = self.client.get('/api/v1/tram/network/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+
+    def test_snapshot_served_from_cache(self):
+        self.client.get('/api/v1/tram/network/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/network/')
+        self.assertEqual(len(json.loads(response.content)['stops']), 3)
+
+    def test_snapshot_rebuilt_after_change(self):
+        self.client.get('/api/v1/tram/network/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Stop.objects.create(name='stop 4')
+        response = self.client.get('/api/v1/tram/network/')
+        self.assertEqual(len(json.loads(response.content)['stops']), 4)
+
+    def test_not_modified_snapshot(self):
+        etag = self.client.get('/api/v1/tram/network/')['ETag']
+        response = self.client.get('/api/v1/tram/network/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_msgpack_snapshot(self):
+        response = self.client.get('/api/v1/tram/network/', {'format': 'msgpack'})
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['routes'], [[self.route.id, 7, 5, [2, 1, 0], [0, 3, 5]]])
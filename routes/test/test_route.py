@@ -1,12 +1,19 @@
+from unittest import mock
+
 from django.conf import settings
+from django.contrib import admin
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
 from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework.authtoken.models import Token
 import django
 import os
 
+from routes.admin import RouteStopAdmin
 from routes.models import Stop, StopConnection, Route, RouteStop
+from routes.serializers import RouteCreationSerializer
 
 os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
 django.setup()
@@ -51,6 +58,31 @@ class TestRoute(TestCase):
             self.assertEqual(route_db.id, route_response['id'])
             self.assertEqual(route_db.name, route_response['name'])
 
+    def test_route_list_query_count_does_not_depend_on_routes_number(self):
+        for number in range(100, 110):
+            route = Route.objects.create(number=number)
+            RouteStop.objects.bulk_create([
+                RouteStop(route=route, stop=self.stop1, number_on_route=1),
+                RouteStop(route=route, stop=self.stop2, number_on_route=2),
+                RouteStop(route=route, stop=self.stop3, number_on_route=3),
+            ])
+        self.client.credentials()
+        # Test cache keeps nothing, so network version is read from the database
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/v1/tram/routes/')
+        self.assertEqual(response.status_code, 200)
+        for route_response in response.json():
+            self.assertEqual(Route.objects.get(id=route_response['id']).name, route_response['name'])
+
+    def test_get_route_list_with_cursor_pagination(self):
+        response = self.client.get('/api/v1/tram/routes/', {'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([route['number'] for route in response.json()['results']], [self.route1.number])
+
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([route['number'] for route in response.json()['results']], [self.route2.number])
+        self.assertIsNone(response.json()['next'])
+
     def test_get_route_details(self):
         response = self.client.get(f'/api/v1/tram/routes/{self.route2.number}/')
         self.assertEqual(response.status_code, 200)
@@ -65,6 +97,20 @@ class TestRoute(TestCase):
             self.assertEqual(stop_db.name, stop['name'])
             self.assertEqual(stop_db.slug, stop['slug'])
 
+    def test_route_details_stops_ordered_with_query_count_not_depending_on_stops_number(self):
+        stops = [Stop.objects.create(name=f'stop {number}') for number in range(4, 30)]
+        route = Route.objects.create(number=20)
+        RouteStop.objects.bulk_create(reversed([
+            RouteStop(route=route, stop=stop, number_on_route=number) for number, stop in enumerate(stops)
+        ]))
+        self.client.credentials()
+        # Test cache keeps nothing: network version, route and its ordered stops
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/tram/routes/{route.number}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stop['id'] for stop in response.json()['stops']], [stop.id for stop in stops])
+        self.assertEqual(response.json()['name'], f'{stops[0].name} - {stops[-1].name}')
+
     def test_create_route(self):
         route_data = {
             'number': 10,
@@ -83,6 +129,26 @@ class TestRoute(TestCase):
         for stop_request, stop_db in zip(route_data['stops'], route_stops):
             self.assertEqual(stop_request['id'], stop_db.id)
 
+    def test_create_route_query_count_does_not_depend_on_stops_number(self):
+        stops = [self.stop1, self.stop2, self.stop3]
+        for number in range(4, 40):
+            stops.append(Stop.objects.create(name=f'stop {number}'))
+            StopConnection.objects.create(stop1=stops[-1], stop2=stops[-2])
+        route_data = {'number': 11, 'stops': [{'id': stop.id} for stop in stops]}
+
+        with self.assertNumQueries(13):
+            response = self.client.post('/api/v1/tram/routes/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 201)
+        route_stops = RouteStop.objects.filter(route__number=11).order_by('number_on_route')
+        self.assertEqual([route_stop.stop_id for route_stop in route_stops], [stop.id for stop in stops])
+
+    def test_create_route_failure_leaves_no_route(self):
+        route_data = {'number': 12, 'stops': [{'id': self.stop1.id}, {'id': self.stop2.id}]}
+        with mock.patch.object(RouteStop.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post('/api/v1/tram/routes/', data=route_data, format='json')
+        self.assertFalse(Route.objects.filter(number=12).exists())
+
     def test_route_update(self):
         route = Route.objects.create(number=20)
         RouteStop.objects.create(route=route, stop=self.stop1, number_on_route=1)
@@ -106,6 +172,110 @@ class TestRoute(TestCase):
         self.assertIn(self.stop2, stops_updated)
         self.assertIn(self.stop3, stops_updated)
 
+    def test_route_patch_does_not_change_duration(self):
+        self.route1.update_offsets()
+        duration = Route.objects.get(id=self.route1.id).duration
+        response = self.client.patch(f'/api/v1/tram/routes/{self.route1.number}/', data={'duration': 999},
+                                     format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Route.objects.get(id=self.route1.id).duration, duration)
+
+    def get_route_stop_ids(self, route: Route) -> list:
+        return list(RouteStop.objects.filter(route=route).order_by('number_on_route').values_list('stop_id', flat=True))
+
+    def test_route_update_without_changes_does_not_write_route_stops(self):
+        self.route1.update_offsets()
+        route_data = {'number': self.route1.number, 'stops': [{'id': self.stop1.id}, {'id': self.stop2.id}]}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put(f'/api/v1/tram/routes/{self.route1.number}/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 200)
+        writes = [query['sql'] for query in queries.captured_queries
+                  if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(writes, [])
+
+    def test_route_update_keeps_unchanged_route_stops(self):
+        route_stops_before = {
+            route_stop.stop_id: route_stop.id for route_stop in RouteStop.objects.filter(route=self.route1)
+        }
+        route_data = {
+            'number': self.route1.number,
+            'stops': [{'id': self.stop3.id}, {'id': self.stop2.id}, {'id': self.stop1.id}]
+        }
+        response = self.client.put(f'/api/v1/tram/routes/{self.route1.number}/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_route_stop_ids(self.route1), [self.stop3.id, self.stop2.id, self.stop1.id])
+        route_stops_after = {
+            route_stop.stop_id: route_stop.id for route_stop in RouteStop.objects.filter(route=self.route1)
+        }
+        self.assertEqual(route_stops_after[self.stop1.id], route_stops_before[self.stop1.id])
+        self.assertEqual(route_stops_after[self.stop2.id], route_stops_before[self.stop2.id])
+
+    def test_route_update_removes_stops(self):
+        stop4 = Stop.objects.create(name='stop 4')
+        StopConnection.objects.create(stop1=self.stop3, stop2=stop4)
+        RouteStop.objects.create(route=self.route2, stop=stop4, number_on_route=3)
+        route_data = {'number': self.route2.number, 'stops': [{'id': self.stop3.id}, {'id': stop4.id}]}
+        response = self.client.put(f'/api/v1/tram/routes/{self.route2.number}/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_route_stop_ids(self.route2), [self.stop3.id, stop4.id])
+
+    def test_route_stop_offsets(self):
+        StopConnection.objects.filter(stop1=self.stop2, stop2=self.stop3).update(time=5)
+        route_data = {'number': 80, 'stops': [{'id': self.stop1.id}, {'id': self.stop2.id}, {'id': self.stop3.id}]}
+        response = self.client.post('/api/v1/tram/routes/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.get('/api/v1/tram/routes/80/')
+        self.assertEqual(response.json()['duration'], 7)
+        self.assertEqual([stop['offset'] for stop in response.json()['stops']], [0, 2, 7])
+        self.assertEqual([stop['id'] for stop in response.json()['stops']],
+                         [self.stop1.id, self.stop2.id, self.stop3.id])
+
+        route_data['stops'] = [{'id': self.stop3.id}, {'id': self.stop2.id}]
+        self.client.put('/api/v1/tram/routes/80/', data=route_data, format='json')
+        response = self.client.get('/api/v1/tram/routes/80/')
+        self.assertEqual(response.json()['duration'], 5)
+        self.assertEqual([stop['offset'] for stop in response.json()['stops']], [0, 5])
+
+    def test_route_stop_offsets_follow_connection_time(self):
+        self.route2.update_offsets()
+        connection = StopConnection.objects.get(stop1=self.stop2, stop2=self.stop3)
+        connection.time = 4
+        connection.save()
+
+        self.route2.refresh_from_db()
+        self.assertEqual(self.route2.duration, 4)
+        route_stops = RouteStop.objects.filter(route=self.route2).order_by('number_on_route')
+        self.assertEqual(list(route_stops.values_list('offset', flat=True)), [0, 4])
+
+    def test_route_stop_offsets_follow_deleted_connection(self):
+        self.route2.update_offsets()
+        StopConnection.objects.get(stop1=self.stop2, stop2=self.stop3).delete()
+
+        self.route2.refresh_from_db()
+        self.assertEqual(self.route2.duration, 0)
+
+    def test_route_stop_offsets_follow_deleted_stop(self):
+        StopConnection.objects.create(stop1=self.stop1, stop2=self.stop3, time=7)
+        route = Route.objects.create(number=40)
+        for number, stop in enumerate([self.stop1, self.stop2, self.stop3], 1):
+            RouteStop.objects.create(route=route, stop=stop, number_on_route=number)
+        route.update_offsets()
+        self.stop2.delete()
+
+        route.refresh_from_db()
+        self.assertEqual(route.duration, 7)
+        self.assertEqual(list(route.routestop_set.order_by('number_on_route').values_list('offset', flat=True)), [0, 7])
+
+    def test_route_stop_offsets_follow_admin_edit(self):
+        self.route1.update_offsets()
+        route_stop = RouteStop.objects.get(route=self.route1, stop=self.stop2)
+        RouteStopAdmin(RouteStop, admin.site).delete_model(None, route_stop)
+
+        self.route1.refresh_from_db()
+        self.assertEqual(self.route1.duration, 0)
+
     def test_route_delete(self):
         route = Route.objects.create(number=30)
         response = self.client.delete(f'/api/v1/tram/routes/{route.number}/')
@@ -135,6 +305,31 @@ class TestRoute(TestCase):
         response = self.client.post('/api/v1/tram/routes/', data=route_data, format='json')
         self.assertEqual(response.status_code, 400)
 
+    def test_route_with_invalid_stop_id(self):
+        route_data = {
+            'number': 60,
+            'stops': [
+                {'id': self.stop1.id},
+                {'id': 1000},
+            ]
+        }
+        response = self.client.post('/api/v1/tram/routes/', data=route_data, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['non_field_errors']
+        self.assertIn({'stops': 'Invalid stop id provided: 1000'}, errors)
+        self.assertIn({'stops': f'Stops {self.stop1.id} and 1000 are not connected'}, errors)
+
+    def test_route_validation_query_count_does_not_depend_on_stops_number(self):
+        stops = [self.stop1, self.stop2, self.stop3]
+        for number in range(4, 40):
+            stops.append(Stop.objects.create(name=f'stop {number}'))
+            StopConnection.objects.create(stop1=stops[-1], stop2=stops[-2])
+        request = APIRequestFactory().post('/api/v1/tram/routes/')
+        route_data = {'number': 70, 'stops': [{'id': stop.id} for stop in stops]}
+        serializer = RouteCreationSerializer(data=route_data, context={'request': request})
+        with self.assertNumQueries(4):
+            self.assertTrue(serializer.is_valid())
+
     def test_list_routes_on_stop(self):
         stop1 = self.client.get(f'/api/v1/tram/stops/{self.stop1.slug}/')
         stop2 = self.client.get(f'/api/v1/tram/stops/{self.stop2.slug}/')
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.graph import invalidate_graph
+from routes.models import Stop
+from routes.network import get_network_version
+from routes.search import get_search_index
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestStopSearch(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        invalidate_graph()
+        for name in ['Central Station', 'Central Park', 'Park Avenue', 'Museum', 'Old Town', 'Königsplatz']:
+            Stop.objects.create(name=name)
+        self.client = APIClient()
+
+    def search(self, query: str, **params) -> list:
+        response = self.client.get('/api/v1/tram/stops/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [stop['name'] for stop in response.json()]
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search('centr'), ['Central Park', 'Central Station'])
+
+    def test_word_prefix_search(self):
+        self.assertEqual(self.search('park'), ['Park Avenue', 'Central Park'])
+
+    def test_exact_match_goes_first(self):
+        self.assertEqual(self.search('museum')[0], 'Museum')
+
+    def test_search_ignores_case_and_accents(self):
+        self.assertEqual(self.search('KONIGS'), ['Königsplatz'])
+
+    def test_fuzzy_search(self):
+        self.assertEqual(self.search('musem'), ['Museum'])
+        self.assertEqual(self.search('old twn'), ['Old Town'])
+
+    def test_search_limit(self):
+        self.assertEqual(len(self.search('p', limit=1)), 1)
+
+    def test_search_result_shape(self):
+        response = self.client.get('/api/v1/tram/stops/', {'q': 'museum'})
+        stop = Stop.objects.get(name='Museum')
+        self.assertEqual(response.json(), [{'id': stop.id, 'name': stop.name, 'slug': stop.slug}])
+
+    def test_index_rebuilt_after_stop_change(self):
+        self.assertEqual(self.search('zoo'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            Stop.objects.create(name='Zoo')
+        self.assertEqual(self.search('zoo'), ['Zoo'])
+
+    def test_search_does_not_query_database(self):
+        get_search_index()
+        get_network_version()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search('old'), ['Old Town'])
@@ -7,7 +7,7 @@ from rest_framework.authtoken.models import Token
 import django
 import os
 
-from routes.models import Stop
+from routes.models import Stop, Route, RouteStop
 
 os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
 django.setup()
@@ -42,6 +42,23 @@ class TestStop(TestCase):
             self.assertEqual(db_stop.id, response_stop['id'])
             self.assertEqual(db_stop.slug, response_stop['slug'])
 
+    def test_get_stops_with_cursor_pagination(self):
+        for number in range(4, 10):
+            Stop.objects.create(name=f'stop {number}')
+
+        stop_ids = []
+        response = self.client.get('/api/v1/tram/stops/', {'page_size': 4})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            response_data = response.json()
+            self.assertLessEqual(len(response_data['results']), 4)
+            stop_ids += [stop['id'] for stop in response_data['results']]
+            if response_data['next'] is None:
+                break
+            response = self.client.get(response_data['next'])
+
+        self.assertEqual(stop_ids, list(Stop.objects.order_by('id').values_list('id', flat=True)))
+
     def test_get_one_stop(self):
         stop_name = self.stop_names[0]
         stop_slug = self.stops[stop_name].slug
@@ -54,6 +71,28 @@ class TestStop(TestCase):
         self.assertEqual(db_stop.name, response_stop['name'])
         self.assertEqual(db_stop.slug, response_stop['slug'])
 
+    def test_get_one_stop_query_count_does_not_depend_on_routes_number(self):
+        stop = self.stops[self.stop_names[0]]
+        for number in range(1, 11):
+            route = Route.objects.create(number=number)
+            RouteStop.objects.bulk_create([
+                RouteStop(route=route, stop=stop, number_on_route=1),
+                RouteStop(route=route, stop=self.stops[self.stop_names[1]], number_on_route=2),
+            ])
+
+        self.client.credentials()
+        # Test cache keeps nothing, so network version is read from the database
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/tram/stops/{stop.slug}/')
+        self.assertEqual(response.status_code, 200)
+        routes = response.json()['routes']
+        self.assertEqual([route['number'] for route in routes], list(range(1, 11)))
+        self.assertEqual({route['name'] for route in routes}, {'stop 1 - stop 2'})
+
+    def test_get_missing_stop(self):
+        response = self.client.get('/api/v1/tram/stops/missing-stop/')
+        self.assertEqual(response.status_code, 404)
+
     def test_create_stop(self):
         stop_data = {'name': 'stop create'}
         response = self.client.post('/api/v1/tram/stops/', data=stop_data)
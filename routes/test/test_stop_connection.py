@@ -0,0 +1,35 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+import django
+import os
+
+from routes.models import Stop, StopConnection
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+class TestStopConnection(TestCase):
+
+    def setUp(self):
+        self.stop1 = Stop.objects.create(name='stop 1')
+        self.stop2 = Stop.objects.create(name='stop 2')
+
+    def test_connection_stored_with_lower_stop_id_first(self):
+        connection = StopConnection.objects.create(stop1=self.stop2, stop2=self.stop1, time=5)
+        connection.refresh_from_db()
+        self.assertEqual((connection.stop1, connection.stop2), (self.stop1, self.stop2))
+
+    def test_duplicate_connection(self):
+        StopConnection.objects.create(stop1=self.stop1, stop2=self.stop2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StopConnection.objects.create(stop1=self.stop2, stop2=self.stop1)
+
+    def test_connection_of_stop_with_itself(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StopConnection.objects.create(stop1=self.stop1, stop2=self.stop1)
+
+    def test_connection_between_stops(self):
+        connection = StopConnection.objects.create(stop1=self.stop1, stop2=self.stop2)
+        self.assertEqual(StopConnection.objects.between(self.stop2.id, self.stop1.id).get(), connection)
+        self.assertEqual(StopConnection.objects.between(self.stop1.id, self.stop2.id).get(), connection)
@@ -0,0 +1,76 @@
+from io import StringIO
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework.authtoken.models import Token
+import django
+import os
+
+from routes.models import Stop
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class TestStopImport(TestCase):
+
+    def setUp(self):
+        self.existing_stop = Stop.objects.create(name='Central Station')
+
+        self.admin = get_user_model().objects.create_user(
+            username='test-admin', password='test-password', email='test-admin@example.com',
+            is_staff=True,
+        )
+        self.user = get_user_model().objects.create_user(
+            username='test-user', password='test-password', email='test-user@example.com'
+        )
+        self.admin_client = APIClient()
+        self.admin_client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.admin).key)
+        self.user_client = APIClient()
+        self.user_client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.user).key)
+
+    def test_import_stops(self):
+        names = [f'Stop {number}' for number in range(50)]
+        with self.assertNumQueries(8):
+            response = self.admin_client.post('/api/v1/tram/stops-import/',
+                                              data={'stops': [{'name': name} for name in names]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([stop['name'] for stop in response.json()['stops']], names)
+        self.assertEqual(Stop.objects.count(), len(names) + 1)
+        self.assertEqual(Stop.objects.get(name='Stop 7').slug, 'stop-7')
+
+    def test_import_reports_all_collisions(self):
+        stops = [{'name': 'Central station'}, {'name': 'Park'}, {'name': 'park'}, {'name': 'Museum'}]
+        response = self.admin_client.post('/api/v1/tram/stops-import/', data={'stops': stops}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['non_field_errors']), 2)
+        self.assertFalse(Stop.objects.filter(name='Museum').exists())
+
+    def test_import_stops_permissions(self):
+        response = self.user_client.post('/api/v1/tram/stops-import/',
+                                         data={'stops': [{'name': 'Park'}]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_stops_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as stops_file:
+            stops_file.write('Park\n\nMuseum\nOld Town\n')
+        self.addCleanup(os.remove, stops_file.name)
+
+        call_command('import_stops', stops_file.name, batch_size=2, stdout=StringIO())
+        self.assertEqual(set(Stop.objects.values_list('slug', flat=True)),
+                         {'central-station', 'park', 'museum', 'old-town'})
+
+    def test_import_stops_command_with_collisions(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as stops_file:
+            stops_file.write('Park\ncentral station\n')
+        self.addCleanup(os.remove, stops_file.name)
+
+        with self.assertRaises(CommandError):
+            call_command('import_stops', stops_file.name, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Stop.objects.count(), 1)
@@ -0,0 +1,133 @@
+from io import StringIO
+from unittest import mock
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+import django
+import os
+
+from routes.graph import invalidate_graph
+from routes.matrix import TravelTimeMatrix, get_travel_time_matrix, invalidate_travel_time_matrix, \
+    rebuild_travel_time_matrix, _rebuild_in_background
+from routes.models import Route, Stop, StopConnection
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_LOCMEM_CACHES, NETWORK_VERSION_TTL=settings.TEST_NETWORK_VERSION_TTL)
+class TestTravelTimes(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        matrix_directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, matrix_directory)
+        matrix_path = override_settings(TRAVEL_TIME_MATRIX_PATH=os.path.join(matrix_directory, 'travel_times.bin'))
+        matrix_path.enable()
+        cls.addClassCleanup(matrix_path.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        invalidate_graph()
+        invalidate_travel_time_matrix()
+        self.stops = [Stop.objects.create(name=f'stop {number}') for number in range(1, 6)]
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[1], time=2)
+        StopConnection.objects.create(stop1=self.stops[1], stop2=self.stops[2], time=2)
+        StopConnection.objects.create(stop1=self.stops[0], stop2=self.stops[2], time=10)
+        StopConnection.objects.create(stop1=self.stops[3], stop2=self.stops[2], time=3)
+        self.client = APIClient()
+
+        if os.path.exists(settings.TRAVEL_TIME_MATRIX_PATH):
+            os.remove(settings.TRAVEL_TIME_MATRIX_PATH)
+        rebuild_travel_time_matrix()
+        patcher = mock.patch('routes.matrix.schedule_travel_time_matrix_rebuild')
+        self.schedule_rebuild = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        invalidate_travel_time_matrix()
+
+    def test_pairwise_travel_time(self):
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[0].slug,
+                                                                  'to': self.stops[3].slug})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'from': self.stops[0].slug, 'times': {self.stops[3].slug: 7}})
+
+    def test_one_to_many_travel_times(self):
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[2].slug})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['times'], {
+            self.stops[0].slug: 4,
+            self.stops[1].slug: 2,
+            self.stops[2].slug: 0,
+            self.stops[3].slug: 3,
+            self.stops[4].slug: None,
+        })
+
+    def test_travel_times_do_not_query_database(self):
+        get_travel_time_matrix()
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/tram/travel-times/', {
+                'from': self.stops[0].slug, 'to': f'{self.stops[1].slug},{self.stops[3].slug}'
+            })
+        self.assertEqual(response.data['times'], {self.stops[1].slug: 2, self.stops[3].slug: 7})
+
+    def test_previous_matrix_served_while_rebuilding(self):
+        self.assertIsNone(get_travel_time_matrix().time(self.stops[0].id, self.stops[4].id))
+        StopConnection.objects.create(stop1=self.stops[4], stop2=self.stops[0], time=1)
+        self.assertIsNone(get_travel_time_matrix().time(self.stops[0].id, self.stops[4].id))
+        self.schedule_rebuild.assert_called()
+
+        self.assertTrue(rebuild_travel_time_matrix())
+        matrix = get_travel_time_matrix()
+        self.assertEqual(matrix.time(self.stops[0].id, self.stops[4].id), 1)
+        self.assertEqual(matrix.time(self.stops[4].id, self.stops[3].id), 8)
+
+    def test_matrix_not_built_on_request(self):
+        os.remove(settings.TRAVEL_TIME_MATRIX_PATH)
+        invalidate_travel_time_matrix()
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[0].slug})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+        self.schedule_rebuild.assert_called_once()
+
+    def test_stop_unknown_to_previous_matrix(self):
+        stop = Stop.objects.create(name='stop 6')
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[0].slug, 'to': stop.slug})
+        self.assertEqual(response.status_code, 503)
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[0].slug,
+                                                                  'to': self.stops[3].slug})
+        self.assertEqual(response.status_code, 200)
+
+    def test_route_change_keeps_matrix(self):
+        matrix = get_travel_time_matrix()
+        Route.objects.create(number=1)
+        self.assertIs(get_travel_time_matrix(), matrix)
+        self.assertFalse(rebuild_travel_time_matrix())
+        self.schedule_rebuild.assert_not_called()
+
+    def test_travel_times_with_unknown_stop(self):
+        response = self.client.get('/api/v1/tram/travel-times/', {'from': self.stops[0].slug, 'to': 'unknown'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_travel_times_without_stop(self):
+        response = self.client.get('/api/v1/tram/travel-times/')
+        self.assertEqual(response.status_code, 400)
+
+    def test_build_travel_times_command(self):
+        call_command('build_travel_times', stdout=StringIO())
+        matrix = TravelTimeMatrix(settings.TRAVEL_TIME_MATRIX_PATH)
+        self.assertEqual(matrix.size, len(self.stops))
+        self.assertEqual(matrix.time(self.stops[3].id, self.stops[0].id), 7)
+
+    def test_failed_background_rebuild_is_logged(self):
+        with mock.patch('routes.matrix.rebuild_travel_time_matrix', side_effect=OSError('disk full')), \
+                mock.patch('routes.matrix.connection'), self.assertLogs('routes.matrix', 'ERROR') as logs:
+            _rebuild_in_background()
+        self.assertIn('Travel time matrix rebuild failed', logs.output[0])
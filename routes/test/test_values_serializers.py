@@ -0,0 +1,47 @@
+import json
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+import django
+import os
+
+from routes.models import Route, RouteStop, Stop
+from routes.serializers import RouteSerializer, RouteValuesSerializer, StopSerializer, StopValuesSerializer
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+@override_settings(CACHES=settings.TEST_CACHES)
+class TestValuesSerializers(TestCase):
+
+    def setUp(self):
+        self.stops = [Stop.objects.create(name=f'Stop {number}') for number in range(1, 4)]
+        for number, stops in [(1, self.stops), (2, self.stops[1:2]), (3, [])]:
+            route = Route.objects.create(number=number)
+            for number_on_route, stop in enumerate(stops, 1):
+                RouteStop.objects.create(route=route, stop=stop, number_on_route=number_on_route)
+
+    def assertSameOutput(self, values_data, data):
+        self.assertEqual(json.dumps(values_data), json.dumps(data))
+
+    def test_stop_values_serializer(self):
+        stops = Stop.objects.order_by('id')
+        self.assertSameOutput(StopValuesSerializer(StopValuesSerializer.values(stops), many=True).data,
+                              StopSerializer(stops, many=True).data)
+
+    def test_route_values_serializer(self):
+        routes = Route.objects.with_name().order_by('number')
+        self.assertSameOutput(RouteValuesSerializer(RouteValuesSerializer.values(routes), many=True).data,
+                              RouteSerializer(routes, many=True).data)
+
+    def test_single_row(self):
+        route = Route.objects.with_name().get(number=1)
+        row = RouteValuesSerializer.values(Route.objects.with_name()).get(number=1)
+        self.assertSameOutput(RouteValuesSerializer(row).data, RouteSerializer(route).data)
+
+    def test_list_endpoints_use_values(self):
+        response = self.client.get('/api/v1/tram/routes/', {'page_size': 2})
+        self.assertEqual([route['name'] for route in response.json()['results']], ['Stop 1 - Stop 3', 2])
+        response = self.client.get('/api/v1/tram/stops/')
+        self.assertSameOutput(response.json(), StopSerializer(Stop.objects.order_by('id'), many=True).data)
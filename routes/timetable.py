@@ -0,0 +1,110 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import islice, repeat
+from typing import Iterator, List, Tuple
+
+from .models import RouteStop, Timetable
+from .network import get_network_version
+
+MINUTES_IN_DAY = 24 * 60
+DEPARTURES_LIMIT = 5
+
+
+def minutes_of_day(value) -> int:
+    """ Convert time of day to minutes from midnight """
+    return value.hour * 60 + value.minute
+
+
+def service_days(day: date) -> int:
+    """ Return timetable service days that run on given date """
+    weekday = day.weekday()
+    if weekday == 5:
+        return Timetable.ServiceDays.SATURDAY
+    if weekday == 6:
+        return Timetable.ServiceDays.SUNDAY
+    return Timetable.ServiceDays.WEEKDAYS
+
+
+class DepartureIndex:
+    """
+    Departures of all routes at every stop, kept as arithmetic sequences instead of materialized rows
+    Departures of a timetable at a stop are range(first + offset, last + offset + 1, headway) in minutes from
+    midnight, so the next departure after any moment is found with one division
+    """
+
+    def __init__(self, timetables: List[tuple], route_stops: List[tuple], version: int = None) -> None:
+        self.version = version
+        timetables_by_route = defaultdict(list)
+        for route_id, route_number, days, first_departure, last_departure, headway in timetables:
+            timetables_by_route[route_id].append(
+                (route_number, days, minutes_of_day(first_departure), minutes_of_day(last_departure), headway)
+            )
+
+        self.departures = defaultdict(lambda: defaultdict(list))
+        for route_id, stop_id, offset in route_stops:
+            for route_number, days, first_departure, last_departure, headway in timetables_by_route[route_id]:
+                series = range(first_departure + offset, last_departure + offset + 1, headway)
+                self.departures[stop_id][days].append((route_number, series))
+
+    @classmethod
+    def load(cls) -> 'DepartureIndex':
+        """ Load timetables and route stop offsets from database """
+        version = get_network_version()
+        timetables = list(Timetable.objects.values_list(
+            'route_id', 'route__number', 'service_days', 'first_departure', 'last_departure', 'headway'
+        ))
+        route_ids = {timetable[0] for timetable in timetables}
+        route_stops = list(
+            RouteStop.objects.filter(route_id__in=route_ids).values_list('route_id', 'stop_id', 'offset')
+        )
+        return cls(timetables, route_stops, version)
+
+    def _departures_of_day(self, stop_id: int, days: int, minute: int, day_shift: int) -> Iterator[Tuple[int, int]]:
+        """ Yield (minute, route number) departures of one service day not earlier than minute, in order """
+        sequences = []
+        for route_number, series in self.departures[stop_id][days]:
+            first = max(0, -(-(minute - series.start) // series.step))
+            sequences.append(zip(range(series.start + day_shift, series.stop + day_shift, series.step)[first:],
+                                 repeat(route_number)))
+        return heapq.merge(*sequences)
+
+    def next_departures(self, stop_id: int, day: date, minute: int, limit: int = DEPARTURES_LIMIT) -> List[tuple]:
+        """
+        Return up to limit next departures from stop as (minutes from midnight of given day, route number)
+        Late trips of previous day which reach the stop after midnight are included, so are trips of next day
+        when there are not enough departures left today
+        """
+        if stop_id not in self.departures:
+            return []
+        previous_day, next_day = day - timedelta(days=1), day + timedelta(days=1)
+        departures = heapq.merge(
+            self._departures_of_day(stop_id, service_days(previous_day), minute + MINUTES_IN_DAY, -MINUTES_IN_DAY),
+            self._departures_of_day(stop_id, service_days(day), minute, 0),
+            self._departures_of_day(stop_id, service_days(next_day), minute - MINUTES_IN_DAY, MINUTES_IN_DAY),
+        )
+        return list(islice(departures, limit))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_departure_index() -> DepartureIndex:
+    """ Return departure index of current process, loading it again when network version changes """
+    global _index
+    index = _index
+    if index is None or index.version != get_network_version():
+        with _index_lock:
+            if _index is None or _index.version != get_network_version():
+                _index = DepartureIndex.load()
+            index = _index
+    return index
+
+
+def invalidate_departure_index() -> None:
+    """ Drop departure index so it is loaded again on next use """
+    global _index
+    with _index_lock:
+        _index = None
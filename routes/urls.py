@@ -2,14 +2,21 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken import views as drf_authtoken_views
 
-from .views import StopView, RouteView, StopDetailView
+from .views import StopView, RouteView, StopDetailView, JourneyView, StopImportView, TravelTimeView, \
+    StopDeparturesView, NetworkSnapshotView, NetworkChangesView
 
 router = DefaultRouter()
 router.register('routes', RouteView, basename='routes')
 
 urlpatterns = [
     path('stops/', StopView.as_view(), name='stops'),
+    path('stops-import/', StopImportView.as_view(), name='stops_import'),
     path('stops/<slug>/', StopDetailView.as_view(), name='stop_details'),
+    path('stops/<slug>/departures/', StopDeparturesView.as_view(), name='stop_departures'),
+    path('journey/', JourneyView.as_view(), name='journey'),
+    path('travel-times/', TravelTimeView.as_view(), name='travel_times'),
+    path('network/', NetworkSnapshotView.as_view(), name='network_snapshot'),
+    path('network/changes/', NetworkChangesView.as_view(), name='network_changes'),
     path('', include(router.urls)),
 
     path('auth/', include('rest_framework.urls')),
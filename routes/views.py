@@ -1,51 +1,107 @@
+from datetime import datetime
+
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
+from rest_framework.exceptions import APIException, NotFound, ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from rest_framework import status
+from rest_framework.views import APIView
 from rest_framework import viewsets, serializers
 from rest_framework import generics
 
 from .models import Stop, Route
 from .serializers import StopSerializer, RouteSerializer, \
-    StopDetailSerializer, RouteDetailSerializer, RouteCreationSerializer
+    StopDetailSerializer, RouteDetailSerializer, RouteCreationSerializer, StopImportSerializer, \
+    StopValuesSerializer, RouteValuesSerializer
 from .permissions import ReadAnyoneWriteAdmin
+from .pagination import StopPagination, RoutePagination
+from .graph import get_graph
+from .matrix import get_travel_time_matrix
+from .search import SEARCH_RESULTS_LIMIT, get_search_index
+from .timetable import DEPARTURES_LIMIT, MINUTES_IN_DAY, get_departure_index, minutes_of_day
+from .network import cache_network_response, get_network_version, network_conditional, read_network_state
+from .snapshot import accepts_gzip, build_network_changes, get_network_snapshot, network_snapshot_conditional
+from tram.renderers import MessagePackRenderer, ORJSONRenderer, msgpack
+from tram.views import ValuesListMixin
 
 
-class StopView(generics.ListCreateAPIView):
+class StopView(ValuesListMixin, generics.ListCreateAPIView):
     queryset = Stop.objects.all()
     serializer_class = StopSerializer
+    values_serializer_class = StopValuesSerializer
     permission_classes = [ReadAnyoneWriteAdmin]
+    pagination_class = StopPagination
+    max_search_limit = 50
 
-    @method_decorator(cache_page(300))
+    @method_decorator(network_conditional)
+    @method_decorator(cache_network_response)
     def list(self, request, *args, **kwargs):
+        """ List all stops or, if "q" query parameter is given, top "limit" stops matching it """
+        if 'q' in request.query_params:
+            return Response(get_search_index().search(request.query_params['q'], self.get_search_limit()))
         return super().list(request, *args, **kwargs)
 
+    def get_search_limit(self) -> int:
+        """ Read number of search results from "limit" query parameter """
+        try:
+            limit = int(self.request.query_params.get('limit', SEARCH_RESULTS_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        return max(1, min(limit, self.max_search_limit))
+
+
+class StopImportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def post(self, request: Request) -> Response:
+        """ Create many stops at once. Nothing is saved if any of stop names collide. """
+        serializer = StopImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status.HTTP_201_CREATED)
+
 
 class StopDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Stop.objects.all()
     lookup_field = 'slug'
     permission_classes = [ReadAnyoneWriteAdmin]
 
+    def get_queryset(self) -> QuerySet:
+        """ Prefetch routes on stop together with their names for GET request """
+        if self.request.method == 'GET':
+            return Stop.objects.with_routes()
+        return super().get_queryset()
+
     def get_serializer_class(self) -> serializers.Serializer:
         """ Return regular serializer for GET request and detailed serializer for other requests """
         if self.request.method == 'GET':
             return StopDetailSerializer
         return StopSerializer
 
-    @method_decorator(cache_page(300))
+    @method_decorator(network_conditional)
+    @method_decorator(cache_network_response)
     def retrieve(self, request: Request, *args, **kwargs) -> Response:
         """ Get stop object with routes on this stop """
-        stop = Stop.objects.get(slug=self.kwargs['slug'])
-        routes_on_stop = Route.objects.filter(stops=stop)
-        setattr(stop, 'routes', routes_on_stop)
-        serializer = StopDetailSerializer(stop)
-        return Response(serializer.data)
+        return super().retrieve(request, *args, **kwargs)
 
 
-class RouteView(viewsets.ModelViewSet):
-    queryset = Route.objects.all()
+class RouteView(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Route.objects.with_name()
     lookup_field = 'number'
+    values_serializer_class = RouteValuesSerializer
     permission_classes = [ReadAnyoneWriteAdmin]
+    pagination_class = RoutePagination
+
+    def get_queryset(self) -> QuerySet:
+        """ Prefetch stops of route for route details """
+        if self.action == 'retrieve':
+            return Route.objects.with_ordered_stops()
+        return super().get_queryset()
 
     def get_serializer_class(self) -> serializers.Serializer:
         """ Return right serializer basing on request type """
@@ -55,10 +111,161 @@ class RouteView(viewsets.ModelViewSet):
             return RouteCreationSerializer
         return RouteDetailSerializer
 
-    @method_decorator(cache_page(300))
+    @method_decorator(network_conditional)
+    @method_decorator(cache_network_response)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
-    @method_decorator(cache_page(300))
+    @method_decorator(network_conditional)
+    @method_decorator(cache_network_response)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+class JourneyView(APIView):
+    permission_classes = [ReadAnyoneWriteAdmin]
+
+    def get(self, request: Request) -> Response:
+        """ Find fastest journey between two stops given by slugs in "from" and "to" query parameters """
+        slugs = {param: request.query_params.get(param) for param in ('from', 'to')}
+        missing = [param for param, slug in slugs.items() if not slug]
+        if missing:
+            raise ValidationError({param: 'This query parameter is required.' for param in missing})
+
+        graph = get_graph()
+        for param, slug in slugs.items():
+            if slug not in graph.index_by_slug:
+                raise NotFound(f'Stop "{slug}" does not exist')
+
+        journey = graph.shortest_path(graph.index_by_slug[slugs['from']], graph.index_by_slug[slugs['to']])
+        if journey is None:
+            raise NotFound(f'Stops "{slugs["from"]}" and "{slugs["to"]}" are not connected')
+        path, time = journey
+        return Response({
+            'from': slugs['from'],
+            'to': slugs['to'],
+            'time': time,
+            'stops': [graph.stop(index) for index in path],
+        })
+
+
+class TravelTimesNotReady(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Travel times are being computed, try again later.'
+    default_code = 'travel_times_not_ready'
+    # Seconds sent in Retry-After header
+    wait = 10
+
+
+class TravelTimeView(APIView):
+    permission_classes = [ReadAnyoneWriteAdmin]
+
+    def get(self, request: Request) -> Response:
+        """
+        Return fastest travel times from stop given by "from" slug to stops given by comma separated "to" slugs
+        Times to all stops are returned if "to" is omitted, not connected stops get null
+        While travel times are recomputed after stops or connections changed, the previous ones are returned.
+        Stops the previous matrix doesn't know get 503 until the new one is ready.
+        """
+        slug_from = request.query_params.get('from')
+        if not slug_from:
+            raise ValidationError({'from': 'This query parameter is required.'})
+
+        graph = get_graph()
+        if 'to' in request.query_params:
+            slugs_to = [slug for slug in request.query_params['to'].split(',') if slug]
+        else:
+            slugs_to = graph.slugs
+        for slug in [slug_from, *slugs_to]:
+            if slug not in graph.index_by_slug:
+                raise NotFound(f'Stop "{slug}" does not exist')
+
+        matrix = get_travel_time_matrix()
+        stop_ids = {slug: graph.stop_ids[graph.index_by_slug[slug]] for slug in [slug_from, *slugs_to]}
+        if matrix is None or any(stop_id not in matrix.index_by_id for stop_id in stop_ids.values()):
+            raise TravelTimesNotReady()
+        return Response({
+            'from': slug_from,
+            'times': {slug: matrix.time(stop_ids[slug_from], stop_ids[slug]) for slug in slugs_to},
+        })
+
+
+class StopDeparturesView(APIView):
+    permission_classes = [ReadAnyoneWriteAdmin]
+    max_limit = 50
+
+    def get(self, request: Request, slug: str) -> Response:
+        """
+        Return next departures of all routes from stop, starting now or at "time" (HH:MM) of today
+        Number of departures is given by "limit" query parameter
+        """
+        graph = get_graph()
+        if slug not in graph.index_by_slug:
+            raise NotFound(f'Stop "{slug}" does not exist')
+
+        now = timezone.localtime()
+        if 'time' in request.query_params:
+            try:
+                now = datetime.combine(now.date(), datetime.strptime(request.query_params['time'], '%H:%M').time())
+            except ValueError:
+                raise ValidationError({'time': 'Time has wrong format. Use HH:MM.'})
+        try:
+            limit = int(request.query_params.get('limit', DEPARTURES_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        limit = max(1, min(limit, self.max_limit))
+
+        minute = minutes_of_day(now)
+        departures = get_departure_index().next_departures(
+            graph.stop_ids[graph.index_by_slug[slug]], now.date(), minute, limit
+        )
+        return Response({
+            'stop': slug,
+            'time': now.strftime('%H:%M'),
+            'departures': [{
+                'route': route_number,
+                'time': '{:02d}:{:02d}'.format(*divmod(departure % MINUTES_IN_DAY, 60)),
+                'minutes': departure - minute,
+            } for departure, route_number in departures],
+        })
+
+
+class NetworkSnapshotView(APIView):
+    """
+    Whole network - stops, connections and routes with ordered stops - in one compact response
+    Meant for clients bootstrapping their local copy instead of requesting every stop and route
+    """
+    permission_classes = [ReadAnyoneWriteAdmin]
+    renderer_classes = [ORJSONRenderer, MessagePackRenderer] if msgpack else [ORJSONRenderer]
+
+    @method_decorator(network_snapshot_conditional)
+    def get(self, request: Request) -> HttpResponse:
+        """ Return network snapshot as JSON or, with "format=msgpack" or Accept header, MessagePack """
+        renderer = request.accepted_renderer
+        content, compressed = get_network_snapshot(renderer)
+        if accepts_gzip(request):
+            response = HttpResponse(compressed, content_type=renderer.media_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(content, content_type=renderer.media_type)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+class NetworkChangesView(APIView):
+    """ Stops, connections and routes upserted or deleted since network version given by client """
+    permission_classes = [ReadAnyoneWriteAdmin]
+    renderer_classes = NetworkSnapshotView.renderer_classes
+
+    def get(self, request: Request) -> Response:
+        """ Return changes since network version in "since" query parameter, along with the current version """
+        try:
+            since = int(request.query_params['since'])
+        except KeyError:
+            raise ValidationError({'since': 'This query parameter is required.'})
+        except ValueError:
+            raise ValidationError({'since': 'A valid integer is required.'})
+        # Version newer than memoized one may have been served by another process already, the database tells
+        if since < 0 or since > get_network_version() and since > read_network_state()[0]:
+            raise ValidationError({'since': 'Unknown network version, download the whole network instead.'})
+        return Response(build_network_changes(since))
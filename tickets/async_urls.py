@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .async_views import read_my_tickets
+from .views import TicketViewSet
+from tram.views import async_read_view
+
+my_tickets = TicketViewSet.as_view({'get': 'my_tickets'}, basename='tickets', detail=False)
+
+urlpatterns = [
+    path('my_tickets/', async_read_view(my_tickets, read_my_tickets), name='tickets-my-tickets'),
+]
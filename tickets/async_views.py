@@ -0,0 +1,27 @@
+from typing import Optional
+
+from django.http import HttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from .models import Ticket
+from .serializers import TicketValuesSerializer
+from .views import filter_active
+from tram.views import authenticate, render_json, values_data
+
+
+async def read_my_tickets(request: Request) -> Optional[HttpResponse]:
+    """
+    Async TicketViewSet.my_tickets
+    Paginated and unauthenticated requests, and requests with invalid "active" filter, are left to the sync view
+    """
+    if {'page_size', 'cursor'} & request.query_params.keys():
+        return None
+    user = await authenticate(request)
+    if user is None:
+        return None
+    try:
+        queryset = filter_active(Ticket.objects.filter(owner=user), request.query_params)
+    except ValidationError:
+        return None
+    return render_json(request, await values_data(TicketValuesSerializer, queryset))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_alter_ticket_start_time'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='start_time',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='validity_time',
+            field=models.IntegerField(choices=[(15, 'Ticket 15 Min'), (30, 'Ticket 30 Min'), (60, 'Ticket 1 Hour'), (1440, 'Ticket 1 Day'), (10080, 'Ticket 7 Days'), (43200, 'Ticket 30 Days')]),
+        ),
+    ]
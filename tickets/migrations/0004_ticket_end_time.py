@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:12
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def fill_end_time(apps, schema_editor):
+    """ Store end time of existing tickets, it used to be calculated on the fly """
+    Ticket = apps.get_model('tickets', 'Ticket')
+    tickets = []
+    for ticket in Ticket.objects.only('start_time', 'validity_time').iterator():
+        ticket.end_time = ticket.start_time + timedelta(minutes=ticket.validity_time)
+        tickets.append(ticket)
+    Ticket.objects.bulk_update(tickets, ['end_time'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_start_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='end_time',
+            field=models.DateTimeField(editable=False, help_text='Start time plus validity time, kept in sync on save', null=True),
+        ),
+        migrations.RunPython(fill_end_time, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticket',
+            name='end_time',
+            field=models.DateTimeField(editable=False, help_text='Start time plus validity time, kept in sync on save'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['owner', 'end_time'], name='tickets_tic_owner_i_1467b6_idx'),
+        ),
+    ]
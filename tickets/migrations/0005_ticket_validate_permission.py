@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_ticket_end_time'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ticket',
+            options={'permissions': [('validate_ticket', 'Can validate tickets of any owner')]},
+        ),
+    ]
@@ -1,9 +1,20 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 from datetime import datetime, timedelta
 
 from accounts.models import User
 
 
+class TicketQuerySet(models.QuerySet):
+
+    def active(self, is_active: bool = True, moment: datetime = None) -> 'TicketQuerySet':
+        """ Tickets valid (or, with is_active false, not valid) at given moment, now by default """
+        moment = moment or timezone.now()
+        valid = Q(start_time__lte=moment, end_time__gt=moment)
+        return self.filter(valid) if is_active else self.exclude(valid)
+
+
 class Ticket(models.Model):
 
     class TicketTime(models.IntegerChoices):
@@ -16,13 +27,27 @@ class Ticket(models.Model):
 
     owner = models.ForeignKey(User, on_delete=models.DO_NOTHING)
     validity_time = models.IntegerField(choices=TicketTime.choices)
-    start_time = models.DateTimeField()
+    start_time = models.DateTimeField(db_index=True)
+    end_time = models.DateTimeField(editable=False, help_text='Start time plus validity time, kept in sync on save')
 
-    @property
-    def end_time(self) -> datetime:
+    objects = TicketQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['owner', 'end_time'])]
+        permissions = [('validate_ticket', 'Can validate tickets of any owner')]
+
+    def calculate_end_time(self) -> datetime:
         """ Calculate ticket end time based on start time and ticket validity time """
         return self.start_time + timedelta(minutes=self.validity_time)
 
+    def save(self, *args, **kwargs) -> None:
+        """ Store end time calculated from start and validity time """
+        self.end_time = self.calculate_end_time()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'start_time', 'validity_time'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'end_time'}
+        super(Ticket, self).save(*args, **kwargs)
+
     def __str__(self):
         validity_time_verbal = {
             self.TicketTime.TICKET_15_MIN: '15 min',
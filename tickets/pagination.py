@@ -0,0 +1,5 @@
+from tram.pagination import OptInCursorPagination
+
+
+class TicketPagination(OptInCursorPagination):
+    ordering = ('start_time', 'id')
@@ -4,3 +4,9 @@ from rest_framework.permissions import IsAdminUser, IsAuthenticated
 class IsOwner(IsAuthenticated):
     def has_object_permission(self, request, view, obj):
         return obj.owner == request.user
+
+
+class IsInspector(IsAuthenticated):
+    """ Ticket inspectors and gate controllers: users granted tickets.validate_ticket permission, not only staff """
+    def has_permission(self, request, view):
+        return super().has_permission(request, view) and request.user.has_perm('tickets.validate_ticket')
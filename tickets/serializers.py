@@ -1,9 +1,12 @@
+from django.conf import settings
+from django.utils import timezone as django_timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from datetime import datetime, timezone
 
 from .models import Ticket
 from accounts.models import User
+from tram.serializers import ValuesSerializer
 
 
 class TicketSerializer(serializers.ModelSerializer):
@@ -57,3 +60,23 @@ class TicketSerializer(serializers.ModelSerializer):
         instance.validity_time = validated_data['validity_time']
         instance.save()
         return instance
+
+
+class TicketValuesSerializer(ValuesSerializer):
+    """ TicketSerializer output built from values() rows """
+    fields = ['id', 'owner__username', 'validity_time', 'start_time', 'end_time']
+
+    def to_representation(self, row: dict) -> dict:
+        return {
+            'id': row['id'],
+            'owner': row['owner__username'],
+            'validity_time': row['validity_time'],
+            'start_time': django_timezone.localtime(row['start_time']).strftime(TicketSerializer.date_format),
+            'end_time': django_timezone.localtime(row['end_time']).strftime(TicketSerializer.date_format),
+        }
+
+
+class TicketBatchValidationSerializer(serializers.Serializer):
+    """ Ids of tickets scanned by gate controller, uploaded in one request """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                max_length=settings.TICKET_VALIDATION_BATCH_LIMIT)
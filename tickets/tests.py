@@ -1,4 +1,6 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
 from datetime import datetime, timedelta, timezone
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
@@ -8,6 +10,8 @@ import os
 
 from accounts.models import User
 from .models import Ticket
+from .serializers import TicketSerializer, TicketValuesSerializer
+from .validation import owner_hash
 
 os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
 django.setup()
@@ -97,6 +101,29 @@ class TestTickets(TestCase):
             self.assertEqual(response_ticket['validity_time'], db_ticket.validity_time)
             self.assertEqual(response_ticket['start_time'], db_ticket.start_time.strftime(self.date_format))
 
+    def test_admin_get_tickets_with_cursor_pagination(self):
+        response = self.admin_client.get('/api/v1/tickets/', {'page_size': 3})
+        self.assertEqual(response.status_code, 200)
+        first_page = response.data['results']
+        self.assertEqual(len(first_page), 3)
+
+        response = self.admin_client.get(response.data['next'])
+        self.assertEqual(response.status_code, 200)
+        second_page = response.data['results']
+        self.assertEqual(len(second_page), len(self.all_tickets) - 3)
+        self.assertIsNone(response.data['next'])
+
+        ticket_ids = [ticket['id'] for ticket in first_page + second_page]
+        self.assertEqual(sorted(ticket_ids), sorted(ticket.id for ticket in self.all_tickets))
+        start_times = [ticket['start_time'] for ticket in first_page + second_page]
+        self.assertEqual(start_times, sorted(start_times))
+
+    def test_user_get_my_tickets_with_cursor_pagination(self):
+        response = self.user_client.get('/api/v1/tickets/my_tickets/', {'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.user_tickets[0].id)
+
     def test_admin_update_ticket(self):
         ticket = Ticket.objects.create(owner=self.user, validity_time=Ticket.TicketTime.TICKET_1_DAY,
                                        start_time=datetime.now(tz=timezone.utc))
@@ -140,6 +167,125 @@ class TestTickets(TestCase):
             response_ticket = self.admin_client.get(f'/api/v1/tickets/{ticket.id}/')
             self.assertEqual(response_ticket.data['end_time'], (start_time + time_delta).strftime(self.date_format))
 
+    @override_settings(ROOT_URLCONF='tram.async_urls')
+    def test_async_my_tickets_same_as_sync_view(self):
+        response = self.user_client.get('/api/v1/tickets/my_tickets/')
+        sync_response = self.user_client.get('/api/v1/tickets/my_tickets/', {'format': 'json'})
+        self.assertFalse(hasattr(response, 'data'))
+        self.assertEqual(response.content, sync_response.content)
+
+    @override_settings(ROOT_URLCONF='tram.async_urls')
+    def test_async_my_tickets_unauthenticated(self):
+        response = APIClient().get('/api/v1/tickets/my_tickets/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_values_serializer_matches_ticket_serializer(self):
+        tickets = Ticket.objects.order_by('id')
+        self.assertEqual(
+            TicketValuesSerializer(TicketValuesSerializer.values(tickets), many=True).data,
+            TicketSerializer(tickets, many=True).data,
+        )
+
+    def test_end_time_kept_in_sync(self):
+        ticket = self.user_tickets[0]
+        ticket.validity_time = Ticket.TicketTime.TICKET_1_DAY
+        ticket.save(update_fields=['validity_time'])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.end_time, ticket.start_time + timedelta(days=1))
+
+    def test_user_get_my_active_tickets(self):
+        for params in ({}, {'format': 'json'}):
+            response = self.user_client.get('/api/v1/tickets/my_tickets/', {'active': 'true', **params})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([ticket['id'] for ticket in response.json()], [self.user_tickets[0].id])
+            response = self.user_client.get('/api/v1/tickets/my_tickets/', {'active': 'false', **params})
+            self.assertEqual([ticket['id'] for ticket in response.json()], [self.user_tickets[1].id])
+
+    def test_admin_get_inactive_tickets(self):
+        expired = Ticket.objects.create(owner=self.user, validity_time=Ticket.TicketTime.TICKET_15_MIN,
+                                        start_time=datetime.now(tz=timezone.utc) - timedelta(hours=1))
+        response = self.admin_client.get('/api/v1/tickets/', {'active': 'false'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({ticket['id'] for ticket in response.json()},
+                         {self.user_tickets[1].id, self.admin_tickets[1].id, expired.id})
+
+    def test_active_filter_runs_in_database(self):
+        with self.assertNumQueries(1):
+            tickets = list(Ticket.objects.filter(owner=self.user).active())
+        self.assertEqual(tickets, [self.user_tickets[0]])
+
+    def test_invalid_active_filter(self):
+        response = self.user_client.get('/api/v1/tickets/my_tickets/', {'active': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('active', response.json())
+
+    def test_validate_ticket(self):
+        response = self.admin_client.get(f'/api/v1/tickets/{self.user_tickets[0].id}/validate/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'id': self.user_tickets[0].id, 'valid': True, 'remaining_minutes': 60, 'owner': owner_hash(self.user.id),
+        })
+        response = self.admin_client.get(f'/api/v1/tickets/{self.user_tickets[1].id}/validate/')
+        self.assertEqual(response.json(), {
+            'id': self.user_tickets[1].id, 'valid': False, 'remaining_minutes': 0, 'owner': owner_hash(self.user.id),
+        })
+        self.assertNotEqual(owner_hash(self.user.id), owner_hash(self.admin.id))
+
+    def test_validate_ticket_query_count(self):
+        # Token lookup and ticket lookup
+        with self.assertNumQueries(2):
+            response = self.admin_client.get(f'/api/v1/tickets/{self.user_tickets[0].id}/validate/')
+        self.assertTrue(response.json()['valid'])
+
+    def test_validate_changed_ticket(self):
+        ticket = self.user_tickets[1]
+        url = f'/api/v1/tickets/{ticket.id}/validate/'
+        self.assertFalse(self.admin_client.get(url).json()['valid'])
+        ticket.start_time = datetime.now(tz=timezone.utc)
+        ticket.save()
+        self.assertTrue(self.admin_client.get(url).json()['valid'])
+        ticket.delete()
+        self.assertEqual(self.admin_client.get(url).status_code, 404)
+
+    def test_validate_ticket_permissions_and_unknown_ticket(self):
+        response = self.user_client.get(f'/api/v1/tickets/{self.user_tickets[0].id}/validate/')
+        self.assertEqual(response.status_code, 403)
+        response = self.admin_client.get('/api/v1/tickets/1000/validate/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_inspector_validates_ticket(self):
+        inspector = User.objects.create_user('inspector', 'inspector@example.com', 'inspector-password')
+        inspector.user_permissions.add(Permission.objects.get(codename='validate_ticket'))
+        client = APIClient()
+        client.force_authenticate(inspector)
+        response = client.get(f'/api/v1/tickets/{self.user_tickets[0].id}/validate/')
+        self.assertEqual(response.status_code, 200)
+        response = client.post('/api/v1/tickets/validate/', {'ids': [self.admin_tickets[0].id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(f'/api/v1/tickets/{self.user_tickets[0].id}/').status_code, 403)
+
+    def test_validate_tickets_batch(self):
+        ticket_ids = [self.user_tickets[0].id, self.admin_tickets[1].id, 1000, self.user_tickets[0].id]
+        # Token lookup and one query for all tickets
+        with self.assertNumQueries(2):
+            response = self.admin_client.post('/api/v1/tickets/validate/', {'ids': ticket_ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tickets'], [
+            {'id': self.user_tickets[0].id, 'valid': True, 'remaining_minutes': 60, 'owner': owner_hash(self.user.id)},
+            {'id': self.admin_tickets[1].id, 'valid': False, 'remaining_minutes': 0,
+             'owner': owner_hash(self.admin.id)},
+            {'id': 1000, 'valid': False, 'remaining_minutes': 0, 'owner': None},
+        ])
+
+    def test_validate_tickets_batch_invalid_request(self):
+        too_many = list(range(1, settings.TICKET_VALIDATION_BATCH_LIMIT + 2))
+        for ids in ([], ['ticket'], too_many):
+            response = self.admin_client.post('/api/v1/tickets/validate/', {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('ids', response.json())
+        response = self.user_client.post('/api/v1/tickets/validate/', {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
     """
     user create ticket
     user create ticket without start time
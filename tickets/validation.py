@@ -0,0 +1,52 @@
+import math
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import Ticket
+
+OWNER_HASH_LENGTH = 16
+
+
+def owner_hash(owner_id: int) -> str:
+    """ Keyed hash of ticket owner, inspectors can tell tickets of one person apart without learning who it is """
+    return salted_hmac('tickets.owner', str(owner_id)).hexdigest()[:OWNER_HASH_LENGTH]
+
+
+def get_tickets_validity(ticket_ids: Iterable[int]) -> Dict[int, tuple]:
+    """ Return (owner hash, start time, end time) of existing tickets among given ids, keyed by ticket id """
+    rows = Ticket.objects.filter(id__in=ticket_ids).values_list('id', 'owner_id', 'start_time', 'end_time')
+    return {
+        ticket_id: (owner_hash(owner_id), start_time, end_time)
+        for ticket_id, owner_id, start_time, end_time in rows
+    }
+
+
+def validate_tickets(ticket_ids: Iterable[int], moment: datetime = None) -> List[dict]:
+    """
+    Validity of tickets at given moment (now by default) in order of ids, duplicates dropped:
+    whether ticket is valid, whole minutes it stays valid and owner hash, which is null for unknown tickets
+    """
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    validity = get_tickets_validity(ticket_ids)
+    moment = moment or timezone.now()
+    results = []
+    for ticket_id in ticket_ids:
+        owner, start_time, end_time = validity.get(ticket_id, (None, None, None))
+        is_valid = owner is not None and start_time <= moment < end_time
+        results.append({
+            'id': ticket_id,
+            'valid': is_valid,
+            'remaining_minutes': math.ceil((end_time - moment).total_seconds() / 60) if is_valid else 0,
+            'owner': owner,
+        })
+    return results
+
+
+def validate_ticket(ticket_id: int, moment: datetime = None) -> Optional[dict]:
+    """ Validity of one ticket as returned by validate_tickets() or None if there is no such ticket """
+    result = validate_tickets([ticket_id], moment)[0]
+    return result if result['owner'] is not None else None
+
@@ -1,31 +1,79 @@
-from rest_framework import viewsets
+from django.db.models import QuerySet
+from django.http import QueryDict
+from rest_framework import serializers, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
-from .models import Ticket
-from .serializers import TicketSerializer
-from .permissions import IsOwner
+from .models import Ticket, TicketQuerySet
+from .serializers import TicketBatchValidationSerializer, TicketSerializer, TicketValuesSerializer
+from .permissions import IsInspector, IsOwner
+from .pagination import TicketPagination
+from .validation import validate_ticket, validate_tickets
+from tram.views import ValuesListMixin
 
 
-class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.all()
+def filter_active(queryset: TicketQuerySet, query_params: QueryDict) -> QuerySet:
+    """ Keep tickets valid now if "active" query parameter is true, tickets not valid now if it is false """
+    if 'active' not in query_params:
+        return queryset
+    try:
+        is_active = serializers.BooleanField().to_internal_value(query_params['active'])
+    except ValidationError as error:
+        raise ValidationError({'active': error.detail})
+    return queryset.active(is_active)
+
+
+class TicketViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Ticket.objects.select_related('owner')
     serializer_class = TicketSerializer
+    values_serializer_class = TicketValuesSerializer
+    pagination_class = TicketPagination
 
     def get_permissions(self) -> bool:
         """ Determine whether to allow user access or not """
         if self.action in ('create', 'retrieve'):
             self.permission_classes = [IsOwner | IsAdminUser]
+        elif self.action in ('validate', 'validate_many'):
+            self.permission_classes = [IsInspector | IsAdminUser]
         elif 'my_tickets' in self.request.path:
             self.permission_classes = [IsAuthenticated]
         else:
             self.permission_classes = [IsAdminUser]
         return super().get_permissions()
 
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """ Apply "active" filter to ticket lists """
+        queryset = super().filter_queryset(queryset)
+        if self.action in ('list', 'my_tickets'):
+            return filter_active(queryset, self.request.query_params)
+        return queryset
+
     @action(methods=['get'], detail=False)
     def my_tickets(self, request: Request) -> Response:
-        """ Returns list of tickets belonging to currently logged in user """
-        tickets = Ticket.objects.filter(owner=request.user)
-        serializer = TicketSerializer(tickets, many=True)
-        return Response(serializer.data)
+        """ Returns list of tickets belonging to currently logged in user, "active" query parameter filters them """
+        return self.list_values(self.filter_queryset(Ticket.objects.filter(owner=request.user)))
+
+    @action(methods=['get'], detail=True)
+    def validate(self, request: Request, pk: str = None) -> Response:
+        """
+        Tell inspector whether ticket is valid now, how many minutes it stays valid and hash of its owner
+        Inspectors are staff or users with tickets.validate_ticket permission, they need not own the ticket.
+        Ticket is not loaded as model instance, validity comes from one primary key lookup
+        """
+        validity = validate_ticket(int(pk)) if pk.isdigit() else None
+        if validity is None:
+            raise NotFound('Ticket does not exist')
+        return Response(validity)
+
+    @action(methods=['post'], detail=False, url_path='validate')
+    def validate_many(self, request: Request) -> Response:
+        """
+        Validate tickets scanned by gate controller in one request: {"ids": [...]} gives validity of every ticket
+        in the same shape as single ticket validation, unknown tickets are not valid and have null owner
+        """
+        serializer = TicketBatchValidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'tickets': validate_tickets(serializer.validated_data['ids'])})
@@ -0,0 +1,13 @@
+"""
+URL configuration with async read path in front of the hot read endpoints, used instead of tram.urls
+when ASYNC_READ_VIEWS setting is on. Everything else is served by tram.urls.
+"""
+from django.urls import path, include
+
+from . import urls
+
+urlpatterns = [
+    path('api/v1/tram/', include('routes.async_urls')),
+    path('api/v1/tickets/', include('tickets.async_urls')),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+
+
+class OptInCursorPagination(CursorPagination):
+    """
+    Cursor pagination which is applied only when client asks for it with "page_size" or "cursor" query parameter
+    Without them list endpoints keep returning the whole collection
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request: Request, view=None):
+        """ Paginate queryset only if pagination was requested """
+        if self.page_size_query_param not in request.query_params \
+                and self.cursor_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
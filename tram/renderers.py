@@ -0,0 +1,43 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer producing the same output with orjson, when it is installed
+    Types orjson doesn't handle the way DRF does (datetimes, Decimal, lazy strings, querysets...) are passed to
+    DRF JSONEncoder. Indented, non-compact or ASCII-only output is left to JSONRenderer.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        content = orjson.dumps(data, default=self.default, option=self.options)
+        # Line and paragraph separators are escaped by JSONRenderer to keep output a strict JavaScript subset
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """ Render data as MessagePack, available only if msgpack package is installed """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
@@ -0,0 +1,31 @@
+from typing import Iterable, Sequence, Union
+
+from django.db.models import QuerySet
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer building representation from .values() rows instead of model instances
+    It skips model instantiation and serializer field machinery, so it is meant for hot list endpoints.
+    Subclasses list lookups to fetch in "fields" and convert a row in "to_representation", the output must
+    match the serializer it stands in for.
+    """
+    fields: Sequence[str] = ()
+
+    def __init__(self, rows: Union[dict, Iterable[dict]], many: bool = False) -> None:
+        self.rows = rows
+        self.many = many
+
+    @classmethod
+    def values(cls, queryset: QuerySet) -> QuerySet:
+        """ Return queryset of rows this serializer reads """
+        return queryset.values(*cls.fields)
+
+    def to_representation(self, row: dict) -> dict:
+        return row
+
+    @property
+    def data(self) -> Union[dict, list]:
+        if self.many:
+            return [self.to_representation(row) for row in self.rows]
+        return self.to_representation(self.rows)
@@ -58,7 +58,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'tram.urls'
+# Async read path of hot read endpoints (tram/async_urls.py) only pays off under an ASGI server. Keep it off
+# until benchmarks/async_read.py shows it beating the WSGI deployment.
+ASYNC_READ_VIEWS = False
+ROOT_URLCONF = 'tram.async_urls' if ASYNC_READ_VIEWS else 'tram.urls'
 
 TEMPLATES = [
     {
@@ -140,6 +143,15 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tram.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'tram.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 AUTH_USER_MODEL = 'accounts.User'
@@ -154,8 +166,29 @@ CACHES = {
         'LOCATION': 'unique-snowflake',
     }
 }
+NETWORK_CACHE_TIMEOUT = 6 * 60 * 60
+# Seconds a process trusts network version it read from the database, writes of other processes show up after it
+NETWORK_VERSION_TTL = 1
+TICKET_VALIDATION_BATCH_LIMIT = 1000
+TRAVEL_TIME_MATRIX_PATH = BASE_DIR / 'travel_times.bin'
+# Agency of exported GTFS feeds, its timezone is TIME_ZONE
+GTFS_AGENCY_NAME = 'Tram'
+GTFS_AGENCY_URL = 'https://example.com/'
+# Stops have no coordinates but GTFS requires them, exported stops are all placed at this (lat, lon)
+GTFS_STOP_LOCATION = (0.0, 0.0)
+# Exported service runs every day from the day of export for this many days
+GTFS_SERVICE_DAYS = 365
 TEST_CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
     }
-}
\ No newline at end of file
+}
+# Tests asserting that no query is made keep network version memoized however slow the test run is
+TEST_NETWORK_VERSION_TTL = 60 * 60
+# Tests checking what gets cached, each of them clears the cache first
+TEST_LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    }
+}
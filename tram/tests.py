@@ -0,0 +1,50 @@
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+import django
+import os
+
+from tram.parsers import ORJSONParser
+from tram.renderers import ORJSONRenderer
+
+os.environ['DJANGO_SETTINGS_MODULE'] = 'tram.settings'
+django.setup()
+
+
+class TestORJSON(SimpleTestCase):
+    data = {
+        'stops': [{'id': 1, 'name': 'Königsplatz', 'slug': 'konigsplatz'}, {'id': 2, 'name': None, 'slug': ''}],
+        'start_time': '2026-10-18 10:00 +0000',
+        'datetime': datetime(2026, 10, 18, 10, 0, 5, 123456, tzinfo=timezone.utc),
+        'naive_datetime': datetime(2026, 10, 18, 10, 0),
+        'date': date(2026, 10, 18),
+        'time': time(10, 5),
+        'duration': timedelta(minutes=15),
+        'price': Decimal('2.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Not found.'),
+        'separators': 'line\u2028paragraph\u2029',
+        1: [True, False, 1.5, -3],
+    }
+
+    def test_same_output_as_json_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_indented_output(self):
+        media_type = 'application/json; indent=4'
+        self.assertEqual(ORJSONRenderer().render(self.data, media_type), JSONRenderer().render(self.data, media_type))
+
+    def test_parser(self):
+        content = '{"stops": [{"id": 1, "name": "Königsplatz"}], "number": 3}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(content)), JSONParser().parse(BytesIO(content)))
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"stops": ['))
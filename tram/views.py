@@ -0,0 +1,100 @@
+from typing import Awaitable, Callable, Optional, Type
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import APIException, NotAcceptable
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .serializers import ValuesSerializer
+
+
+class ValuesListMixin:
+    """
+    Opt-in fast path of list action: with "values_serializer_class" set, rows are fetched with .values()
+    and serialized by it into the same shape the regular serializer returns
+    """
+    values_serializer_class = None
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        return self.list_values(self.filter_queryset(self.get_queryset()))
+
+    def list_values(self, queryset: QuerySet) -> Response:
+        """ Serialize queryset with values serializer, paginated if pagination was requested """
+        rows = self.values_serializer_class.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer_class(page, many=True).data)
+        return Response(self.values_serializer_class(rows, many=True).data)
+
+
+def initialize_drf_request(view: Callable, request: HttpRequest, *args, **kwargs) -> Optional[Request]:
+    """
+    DRF request to view function the way its dispatch sets it up: authenticators, renderer and media type
+    chosen by content negotiation of the view. Return None if no renderer of the view is acceptable.
+    """
+    instance = view.cls(**view.initkwargs)
+    instance.action_map = getattr(view, 'actions', {})
+    instance.args, instance.kwargs = args, kwargs
+    drf_request = instance.initialize_request(request, *args, **kwargs)
+    instance.request = drf_request
+    instance.format_kwarg = instance.get_format_suffix(**kwargs)
+    try:
+        drf_request.accepted_renderer, drf_request.accepted_media_type = \
+            instance.perform_content_negotiation(drf_request)
+    except NotAcceptable:
+        return None
+    return drf_request
+
+
+async def values_data(serializer_class: Type[ValuesSerializer], queryset: QuerySet) -> list:
+    """ Serialize queryset with values serializer, fetching rows with async ORM """
+    rows = [row async for row in serializer_class.values(queryset)]
+    return serializer_class(rows, many=True).data
+
+
+async def authenticate(request: Request) -> Optional[object]:
+    """ Return user authenticated by authenticators of the DRF request or None, authentication runs in a thread """
+    def get_user():
+        try:
+            user = request.user
+        except APIException:
+            return None
+        return user if user.is_authenticated else None
+    return await sync_to_async(get_user)()
+
+
+def render_json(request: Request, data) -> HttpResponse:
+    """ Response with data rendered by accepted JSON renderer the way DRF Response would render it """
+    content = request.accepted_renderer.render(data, request.accepted_media_type)
+    response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def async_read_view(view: Callable, read: Callable[..., Awaitable[Optional[HttpResponse]]]) -> Callable:
+    """
+    Put async read path in front of a DRF view, used by the urlconf tram/async_urls.py
+    GET requests negotiated to JSON are answered by "read" coroutine with async ORM and cache, without holding
+    a thread. Other methods and formats, and requests "read" doesn't answer (returns None), go to the DRF view
+    in a thread.
+    """
+    sync_view = sync_to_async(view)
+
+    async def async_view(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if request.method == 'GET':
+            drf_request = initialize_drf_request(view, request, *args, **kwargs)
+            if drf_request is not None and isinstance(drf_request.accepted_renderer, JSONRenderer):
+                response = await read(drf_request, *args, **kwargs)
+                if response is not None:
+                    return response
+        return await sync_view(request, *args, **kwargs)
+
+    # DRF views handle CSRF themselves
+    async_view.csrf_exempt = True
+    return async_view